@@ -4,6 +4,24 @@ import math
 from pygame.math import Vector2
 import asyncio
 import platform
+import collections
+import itertools
+import json
+import struct
+import time
+import zlib
+import argparse
+import bisect
+import heapq
+import os
+import queue
+import shlex
+import shutil
+import subprocess
+import threading
+import gc
+import tracemalloc
+import sys
 
 # --- Constants ---
 WIDTH, HEIGHT = 1400, 900
@@ -25,6 +43,18 @@ NUM_OBSTACLES = 10
 GRID_CELL_SIZE = 80
 GRID_COLS = math.ceil(WIDTH / GRID_CELL_SIZE)
 GRID_ROWS = math.ceil(HEIGHT / GRID_CELL_SIZE)
+# Multi-resolution grid: each species is bucketed on demand at a ladder of cell sizes, doubling from one
+# sized so that its cells hold about GRID_CELL_OCCUPANCY entities at the smoothed density observed so far
+# (rounded to GRID_CELL_STEP, within GRID_MIN_CELL_SIZE..GRID_MAX_CELL_SIZE). Every query uses the level
+# with the lowest estimated cost (cells visited * GRID_CELL_COST + candidates measured) for its radius,
+# or a plain scan of the species when it is sparse enough that no level beats measuring everyone.
+MULTI_RESOLUTION_GRID_ENABLED = True
+GRID_MIN_CELL_SIZE = 15
+GRID_MAX_CELL_SIZE = 160
+GRID_CELL_STEP = 5
+GRID_CELL_OCCUPANCY = 1.0
+GRID_CELL_COST = 1.5
+GRID_DENSITY_SMOOTHING = 0.2
 
 # --- Boid Parameters ---
 BOID_COLOR = (100, 180, 255)
@@ -94,10 +124,12 @@ WATER_MAX_LEVEL = 100.0
 # --- Obstacle Parameters ---
 OBSTACLE_COLOR = (150, 150, 150)
 OBSTACLE_SIZE = 25
+OBSTACLE_MAX_COUNT = NUM_OBSTACLES + 15
 
 # --- Sickness Parameters ---
 SICKNESS_TRANSMISSION_RADIUS = 15
 SICKNESS_CHANCE_PER_FRAME_NEAR_SICK = 0.008 * SIM_SPEED
+SICKNESS_HAZARD_PER_CONTACT = -math.log(1.0 - SICKNESS_CHANCE_PER_FRAME_NEAR_SICK)
 SICKNESS_HEALTH_IMPACT = 0.05 * SIM_SPEED
 SICKNESS_SPEED_PENALTY_FACTOR = 0.7
 SICKNESS_DURATION_MIN = 300
@@ -137,16 +169,180 @@ PREDATOR_DIALOGUES = [
 DIALOGUE_CHANCE_BASE = 0.0001
 DIALOGUE_CHANCE_STATUS = 0.004
 DIALOGUE_CHANCE_EVENT = 0.03
+DIALOGUE_EVENTS = ("heatwave", "acid_rain", "storm")
 
 # --- Natural Events Parameters ---
 EVENT_INTERVAL_MIN = 900 * (1/SIM_SPEED)
 EVENT_INTERVAL_MAX = 2400 * (1/SIM_SPEED)
 EVENT_TYPES = ["storm", "sickness_outbreak", "food_bloom", "predator_influx", "heatwave", "acid_rain", "obstacle_spawn", "calm"]
+EVENT_TINTS = {"heatwave": (255, 200, 200), "acid_rain": (200, 255, 200), "storm": (200, 200, 255)}
+
+# --- Event Sampling ---
+# Rare per-tick rolls are replaced by geometric waiting times kept on a timer wheel;
+# set EVENT_SAMPLING_ENABLED = False to fall back to one Bernoulli roll per tick.
+EVENT_SAMPLING_ENABLED = True
+TIMER_WHEEL_SIZE = 256
+DIALOGUE_CANDIDATE_CHANCE = (DIALOGUE_CHANCE_BASE + DIALOGUE_CHANCE_STATUS + DIALOGUE_CHANCE_EVENT) * SIM_SPEED
+EVENT_SPAWN_CHANCES = {"food_bloom": 0.03 * SIM_SPEED, "predator_influx": 0.004 * SIM_SPEED, "obstacle_spawn": 0.0008 * SIM_SPEED}
+
+# --- Lazy Vitals ---
+# Agent vitals are stored as (value, last settled tick) and advanced in closed form when read;
+# death, recovery and reproduction-readiness crossings wait in a priority queue instead. Steering and
+# state code only peek at them, so an agent settles when its vitals are written or its event fires.
+LAZY_VITALS_ENABLED = True
+VITAL_SPECIES = ("boid", "predator")
+VITAL_EVENTS = ("heatwave", "acid_rain")
+VITALS_QUEUE_COMPACT_SIZE = 4096
+
+# --- Neighbor Lists ---
+# Verlet lists: an agent keeps the candidates within its interaction radii plus a skin, and only
+# re-queries the grid once it, or anything in the surrounding cells, may have moved half the skin.
+NEIGHBOR_LISTS_ENABLED = False
+NEIGHBOR_SKIN = 20
+BENCHMARK_POPULATIONS = [100, 300, 600, 1000]
+BENCHMARK_TICKS = 60
+
+# --- Steering ---
+# Whether a flockmate has a predator within distress range is looked up once per tick and shared by
+# every boid flocking with it, instead of one grid query per flocking pair.
+STEERING_CACHE_ENABLED = True
+STEERING_BENCHMARK_POPULATIONS = [1000, 1500, 2000]
+
+# --- Two-Phase Tick ---
+# Agents first sense and steer against a world nobody is changing, recording what they eat, drink or kill
+# as claims; contested claims are settled in fixed batches (kills, then meals, then water) before anyone
+# moves, so the outcome no longer depends on the order agents are visited in. Threat marks that flockmates
+# relay and contacts with sick agents go through the same ledger instead of being written onto neighbors.
+TWO_PHASE_TICK_ENABLED = True
+AGENT_PHASES = ("grid", "packs", "sense", "commit", "boids", "predators")
+
+# --- Far-Field Perception ---
+# Past their exact perception radius, agents can also sense boids and predators out to FAR_FIELD_RADIUS
+# through a Barnes-Hut quadtree rebuilt each tick: a node that looks smaller than FAR_FIELD_OPENING_ANGLE
+# from the agent is taken as a whole, from its counts, centroids and summed velocity.
+FAR_FIELD_ENABLED = False
+FAR_FIELD_RADIUS = 300
+FAR_FIELD_OPENING_ANGLE = 0.5
+FAR_FIELD_LEAF_SIZE = 8
+FAR_FIELD_MAX_DEPTH = 12
+FAR_FIELD_ALIGNMENT_WEIGHT = 0.3
+FAR_FIELD_COHESION_WEIGHT = 0.2
+FAR_FIELD_THREAT_WEIGHT = 0.8
+FAR_FIELD_PREY_WEIGHT = 0.5
+
+# --- Predator Packs ---
+# Predators chained within PACK_LINK_RADIUS of each other form a pack, reclustered every PACK_CLUSTER_INTERVAL
+# ticks. Each tick a pack's blackboard gathers its centroid and mean velocity once and hands every member
+# a target from the boids it can see, preferring those no packmate already chases.
+PACK_COORDINATION_ENABLED = False
+PACK_CLUSTER_INTERVAL = 30
+PACK_LINK_RADIUS = PREDATOR_PERCEPTION_RADIUS
+PACK_BENCHMARK_POPULATIONS = [20, 60, 120]
+
+# --- Bulk Spawning ---
+# World creation and spawn bursts place a whole batch at once: positions first ("uniform", "stratified"
+# jittered cells or "poisson" disk), kept SPAWN_OBSTACLE_MARGIN clear of obstacles, then headings and
+# speeds, then one insertion into the pool. Obstacles go in first, so everything else can avoid them.
+BULK_SPAWN_ENABLED = False
+SPAWN_PLACEMENT = "stratified"
+SPAWN_OBSTACLE_MARGIN = 5
+SPAWN_MAX_ATTEMPTS = 30
+SPAWN_POISSON_PACKING = 0.7
+SPAWN_GC_PAUSE_MIN = 500  # batches this large build with the cycle collector paused
+SPAWN_BENCHMARK_POPULATIONS = [1000, 5000, 20000]
+
+# --- Steering Time-Slicing ---
+# Agents re-run their steering only as often as their surroundings call for, judged from what they saw at
+# their last refresh plus live checks for a predator in range (boids) or water and prey within reach
+# (predators): threatened, sick or exposed agents and those about to eat, drink or kill steer every tick, a
+# flocking boid every STEERING_FLOCK_INTERVAL ticks and a resting agent every STEERING_CALM_INTERVAL, each
+# reapplying its last force in between. At most STEERING_REFRESH_BUDGET of the non-urgent refreshes run per
+# tick; the rest wait, for at most STEERING_MAX_STALENESS ticks. The budget is a count rather than CPU time,
+# so seeded runs stay reproducible, and it only bounds this deferrable work: urgent refreshes always run, so
+# a tick crowded with them is not bounded.
+STEERING_SLICING_ENABLED = False
+STEERING_FLOCK_INTERVAL = 2
+STEERING_CALM_INTERVAL = 4
+STEERING_REFRESH_BUDGET = 250
+STEERING_MAX_STALENESS = 8
 
 # --- Particle System ---
 PARTICLE_DECAY = 7 * SIM_SPEED
 PARTICLE_SIZE = 2
 PARTICLE_SPEED = 1.0
+PARTICLE_MAX_COUNT = 3000
+
+# --- Simulation Speed ---
+# SIM_SPEED is the fixed tick size; SIMULATION_SPEED is how many of those ticks run per rendered frame.
+SIMULATION_SPEED = 1.0
+SPEED_STEPS = [0.25, 0.5, 1, 2, 5, 10, 20, 50, 100]
+SPEED_FRAME_BUDGET_MS = 12
+SPEED_RATE_WINDOW = 0.5
+
+# --- Population Analytics ---
+ANALYTICS_AGE_BIN = 100
+ANALYTICS_VITALS_BINS = 10
+ANALYTICS_VITALS_REFRESH_TICKS = 30
+ANALYTICS_SAMPLE_INTERVAL = 20
+ANALYTICS_WINDOW = 500
+
+# --- Live Metrics ---
+METRICS_ENABLED = False
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 8765
+METRICS_QUEUE_SIZE = 64
+METRICS_PUBLISH_INTERVAL = 10
+METRICS_SNAPSHOT_TIMEOUT = 2.0
+
+# --- Replay Recording ---
+REPLAY_RECORD_PATH = None
+REPLAY_KEYFRAME_INTERVAL = 300
+REPLAY_POSITION_SCALE = 10
+REPLAY_SEEK_STEP = 600
+REPLAY_MAX_SPEED = 64
+
+# --- Frame Export ---
+EXPORT_DIRECTORY = None
+EXPORT_ENCODER_COMMAND = None
+EXPORT_EVERY = 1
+EXPORT_QUEUE_SIZE = 32
+EXPORT_PNG_COMPRESSION = 3
+EXPORT_WAIT_MS = 50  # how long a capture waits for room in a full queue before dropping the frame
+EXPORT_FALLBACK_DIRECTORY = "frames"  # PNG output when the encoder cannot be started and no directory was given
+
+# --- Soak Testing ---
+# A soak run samples the process RSS, the bytes held by each long-lived subsystem and the mean tick time
+# every SOAK_SAMPLE_INTERVAL ticks, stops as soon as any of them passes its ceiling, and finally reports
+# every series that kept growing after the warmup. tracemalloc (about 10x slower ticks; 0 frames turns it
+# off) starts halfway through the warmup, so that the snapshot taken at its end already covers a full
+# generation of agents and later snapshots differ from it only by what actually accumulated.
+SOAK_SAMPLE_INTERVAL = 5000
+SOAK_WARMUP_TICKS = 20000
+SOAK_TRACEMALLOC_FRAMES = 1
+SOAK_GROWTH_TOLERANCE = 0.1
+SOAK_GROWTH_MIN_BYTES = 256 << 10
+SOAK_TOP_ALLOCATIONS = 5
+SOAK_CEILINGS = {"rss": 1024 << 20, "entities": 64 << 20, "particles": 8 << 20, "analytics": 4 << 20,
+                 "schedules": 16 << 20, "grid": 4 << 20}
+
+# --- Reference Parity ---
+# A parity run steps a reference world, with every optimization toggle set as in PARITY_REFERENCE (the
+# plain object-based tick), and a candidate world with the toggles under test, from the same seed and in
+# lockstep, and reports the first tick, entity and rule where they differ by more than PARITY_TOLERANCES.
+# The two-phase tick stays on in the reference: it changes the order in which agents see each other on
+# purpose, so every optimization is checked on top of it.
+PARITY_REFERENCE = {"EVENT_SAMPLING_ENABLED": False, "LAZY_VITALS_ENABLED": False, "MULTI_RESOLUTION_GRID_ENABLED": False,
+                    "NEIGHBOR_LISTS_ENABLED": False, "STEERING_CACHE_ENABLED": False, "TWO_PHASE_TICK_ENABLED": True,
+                    "FAR_FIELD_ENABLED": False, "PACK_COORDINATION_ENABLED": False, "BULK_SPAWN_ENABLED": False,
+                    "STEERING_SLICING_ENABLED": False}
+PARITY_TOLERANCES = {"position": 1e-6, "velocity": 1e-6, "vitals": 1e-6}
+PARITY_SEED = 1
+# Module state a world reads and writes while stepping; each side of a parity run keeps its own copy.
+PARITY_STATE = ("frame_count", "timers", "_entity_ids", "event_timer", "current_event", "event_duration",
+                "event_timer_countdown", "event_serial", "story_index", "story_message", "story_timer")
+PARITY_RULES = {"position": "steering", "velocity": "steering", "energy": "vitals", "thirst": "vitals",
+                "health": "vitals", "sick": "sickness", "state": "update_state", "spawn": "world creation", "birth": "reproduction",
+                "death": "death", "food": "foraging", "event": "events"}
 
 # --- Story Parameters ---
 STORY_EVENTS = [
@@ -157,6 +353,70 @@ STORY_EVENTS = [
     (4000, "The ecosystem stabilizes, but storms loom.")
 ]
 
+# --- Species Table ---
+# Each species is plain data. INTERACTIONS lists, per species, which other species it reacts to,
+# with which rule and within which radius; the interaction kernel only queries those pairs.
+def _static_species(color, size):
+    return {
+        "color": color, "max_speed": 0, "max_force": 0, "size": size,
+        "start_energy": 0, "energy_decay": 0, "max_energy": 0,
+        "start_health": 1, "health_decay": 0, "max_health": 1,
+        "start_thirst": 1, "thirst_decay": 0, "max_thirst": 1, "max_age": 1,
+        "aged_speed_penalty_factor": 0, "aged_health_penalty_factor": 0,
+    }
+
+SPECIES = {
+    "boid": {
+        "color": BOID_COLOR, "max_speed": MAX_BOID_SPEED, "max_force": MAX_BOID_FORCE, "size": BOID_SIZE,
+        "start_energy": BOID_START_ENERGY, "energy_decay": BOID_ENERGY_DECAY, "max_energy": BOID_MAX_ENERGY,
+        "start_health": BOID_START_HEALTH, "health_decay": BOID_HEALTH_DECAY, "max_health": BOID_MAX_HEALTH,
+        "start_thirst": BOID_START_THIRST, "thirst_decay": BOID_THIRST_DECAY, "max_thirst": BOID_MAX_THIRST,
+        "max_age": BOID_MAX_AGE,
+        "aged_speed_penalty_factor": BOID_AGED_SPEED_PENALTY_FACTOR,
+        "aged_health_penalty_factor": BOID_AGED_HEALTH_PENALTY_FACTOR,
+        "separation_radius": BOID_SEPARATION_RADIUS,
+        "distress_radius": PREDATOR_PERCEPTION_RADIUS * 0.8,
+        "susceptible": True,
+        "dialogues": BOID_DIALOGUES,
+    },
+    "predator": {
+        "color": PREDATOR_COLOR, "max_speed": MAX_PREDATOR_SPEED, "max_force": MAX_PREDATOR_FORCE, "size": PREDATOR_SIZE,
+        "start_energy": PREDATOR_START_ENERGY, "energy_decay": PREDATOR_ENERGY_DECAY, "max_energy": PREDATOR_MAX_ENERGY,
+        "start_health": PREDATOR_START_HEALTH, "health_decay": PREDATOR_HEALTH_DECAY, "max_health": PREDATOR_MAX_HEALTH,
+        "start_thirst": PREDATOR_START_THIRST, "thirst_decay": PREDATOR_THIRST_DECAY, "max_thirst": PREDATOR_MAX_THIRST,
+        "max_age": PREDATOR_MAX_AGE,
+        "aged_speed_penalty_factor": PREDATOR_AGED_SPEED_PENALTY_FACTOR,
+        "aged_health_penalty_factor": PREDATOR_AGED_HEALTH_PENALTY_FACTOR,
+        "separation_radius": PREDATOR_SEPARATION_RADIUS,
+        "susceptible": True,
+        "dialogues": PREDATOR_DIALOGUES,
+    },
+    "food": _static_species(FOOD_COLOR, FOOD_SIZE),
+    "water": _static_species(WATER_COLOR, WATER_SIZE),
+    "obstacle": _static_species(OBSTACLE_COLOR, OBSTACLE_SIZE),
+}
+
+INTERACTIONS = {
+    "boid": {
+        "boid": ("flock", BOID_PERCEPTION_RADIUS),
+        "predator": ("flee", BOID_PERCEPTION_RADIUS),
+        "food": ("eat", BOID_PERCEPTION_RADIUS),
+        "water": ("drink", BOID_PERCEPTION_RADIUS),
+        "obstacle": ("avoid", OBSTACLE_SIZE + BOID_SIZE),
+    },
+    "predator": {
+        "boid": ("seek", PREDATOR_PERCEPTION_RADIUS),
+        "predator": ("flock", PREDATOR_PERCEPTION_RADIUS),
+        "water": ("drink", WATER_SIZE),
+        "obstacle": ("avoid", OBSTACLE_SIZE + PREDATOR_SIZE),
+    },
+}
+
+# With packs, predators take their prey from the blackboard instead of scanning for it.
+PACK_INTERACTIONS = dict(INTERACTIONS, predator={species: rule for species, rule in INTERACTIONS["predator"].items() if species != "boid"})
+
+SUSCEPTIBLE_SPECIES = tuple(name for name, params in SPECIES.items() if params.get("susceptible"))
+
 class Camera:
     def __init__(self):
         self.position = Vector2(WIDTH / 2, HEIGHT / 2)
@@ -220,52 +480,779 @@ def get_grid_cell(position):
     row = max(0, min(row, GRID_ROWS - 1))
     return (col, row)
 
-def get_neighbors_from_grid(position, perception_radius, grid, entity_type=None):
-    cell = get_grid_cell(position)
-    neighbors = []
-    cell_check_radius = math.ceil(perception_radius / GRID_CELL_SIZE)
-    for i in range(max(0, cell[0] - cell_check_radius), min(GRID_COLS, cell[0] + cell_check_radius + 1)):
-        for j in range(max(0, cell[1] - cell_check_radius), min(GRID_ROWS, cell[1] + cell_check_radius + 1)):
-            if (i, j) in grid:
-                for entity in grid[(i, j)]:
-                    if entity.position.distance_to(position) < perception_radius:
-                        if entity_type is None or isinstance(entity, entity_type):
-                            neighbors.append(entity)
-    return neighbors
+def get_neighbors_from_grid(position, perception_radius, grid, species=None, distances=None):
+    return grid.query(position, perception_radius, species, distances)
+
+class GridTuner:
+    # Lives across ticks: keeps a smoothed, entity-weighted density per species (how crowded the cells a
+    # query actually visits are), sizes the species' levels from it and picks each query's level.
+    def __init__(self):
+        self.adaptive = MULTI_RESOLUTION_GRID_ENABLED
+        self.density = {}
+        self.queries = 0
+        self.scanned = 0
+        self.found = 0
+
+    def observe(self, species, cell_size, cells):
+        count = 0
+        squares = 0
+        for bucket in cells.values():
+            count += len(bucket)
+            squares += len(bucket) * len(bucket)
+        if count:
+            density = squares / count / (cell_size * cell_size)
+            previous = self.density.get(species)
+            self.density[species] = density if previous is None else previous + (density - previous) * GRID_DENSITY_SMOOTHING
+
+    def levels(self, density):
+        base = math.sqrt(GRID_CELL_OCCUPANCY / density) if density > 0 else GRID_MAX_CELL_SIZE
+        base = max(GRID_MIN_CELL_SIZE, min(GRID_MAX_CELL_SIZE, base))
+        while base / 2 >= GRID_MIN_CELL_SIZE:
+            base /= 2
+        sizes = []
+        while base <= GRID_MAX_CELL_SIZE:
+            # Rounded so that small drifts in density keep the same levels, and with them the same buckets.
+            sizes.append(max(GRID_MIN_CELL_SIZE, round(base / GRID_CELL_STEP) * GRID_CELL_STEP))
+            base *= 2
+        return sizes
+
+    def best_level(self, species, radius, population):
+        # None means scanning the whole species is cheapest.
+        if not self.adaptive:
+            return GRID_CELL_SIZE
+        density = self.density.get(species, population / (WIDTH * HEIGHT))
+        best_size, best_cost = None, population
+        for cell_size in self.levels(density):
+            span = 2 * math.ceil(radius / cell_size) + 1
+            extent = span * cell_size
+            cost = span * span * GRID_CELL_COST + min(population, density * min(extent, WIDTH) * min(extent, HEIGHT))
+            if cost < best_cost:
+                best_size, best_cost = cell_size, cost
+        return best_size
+
+class SpatialGrid:
+    def __init__(self, pool, tuner):
+        self.tuner = tuner
+        # The pool's own lists, not copies: deaths and births only reach them at commit, after the agents
+        # have run.
+        self.members = {}
+        for members in pool.members.values():
+            if members:
+                self.members[members[0].species] = members
+        self.levels = {}
+        self.plans = {}
+        self.far_field_tree = None
+
+    def far_field(self):
+        if self.far_field_tree is None:
+            self.far_field_tree = FarFieldTree(self.members.get("boid", ()), self.members.get("predator", ()))
+        return self.far_field_tree
+
+    def cells(self, species, cell_size=GRID_CELL_SIZE):
+        key = (species, cell_size)
+        cells = self.levels.get(key)
+        if cells is None:
+            cells = {}
+            cols = math.ceil(WIDTH / cell_size)
+            rows = math.ceil(HEIGHT / cell_size)
+            for entity in self.members.get(species, ()):
+                cell = (max(0, min(int(entity.position.x / cell_size), cols - 1)),
+                        max(0, min(int(entity.position.y / cell_size), rows - 1)))
+                if cell not in cells:
+                    cells[cell] = []
+                cells[cell].append(entity)
+            self.levels[key] = cells
+            self.tuner.observe(species, cell_size, cells)
+        return cells
+
+    def plan(self, species, radius):
+        members = self.members[species]
+        cell_size = self.tuner.best_level(species, radius, len(members))
+        if cell_size is None:
+            return None, members, 0, 0, 0
+        return cell_size, self.cells(species, cell_size), math.ceil(WIDTH / cell_size), math.ceil(HEIGHT / cell_size), math.ceil(radius / cell_size)
+
+    def query(self, position, radius, species=None, distances=None):
+        # When given a list, the distance to each neighbor is appended to it alongside the neighbor.
+        if species is None:
+            species = tuple(self.members)
+        elif isinstance(species, str):
+            species = (species,)
+        neighbors = []
+        scanned = 0
+        found = 0
+        plans = self.plans
+        for name in species:
+            if name not in self.members:
+                continue
+            plan = plans.get((name, radius))
+            if plan is None:
+                plan = plans[(name, radius)] = self.plan(name, radius)
+            cell_size, cells, col_count, row_count, cell_check_radius = plan
+            if cell_size is None:
+                for entity in cells:
+                    distance = entity.position.distance_to(position)
+                    if distance < radius:
+                        neighbors.append(entity)
+                        if distances is not None:
+                            distances.append(distance)
+                continue
+            found -= len(neighbors)
+            col = int(position.x / cell_size)
+            col = 0 if col < 0 else col_count - 1 if col >= col_count else col
+            row = int(position.y / cell_size)
+            row = 0 if row < 0 else row_count - 1 if row >= row_count else row
+            cols = range(col - cell_check_radius if col > cell_check_radius else 0,
+                         col + cell_check_radius + 1 if col + cell_check_radius + 1 < col_count else col_count)
+            rows = range(row - cell_check_radius if row > cell_check_radius else 0,
+                         row + cell_check_radius + 1 if row + cell_check_radius + 1 < row_count else row_count)
+            for i in cols:
+                for j in rows:
+                    bucket = cells.get((i, j))
+                    if bucket:
+                        scanned += len(bucket)
+                        for entity in bucket:
+                            distance = entity.position.distance_to(position)
+                            if distance < radius:
+                                neighbors.append(entity)
+                                if distances is not None:
+                                    distances.append(distance)
+            found += len(neighbors)
+        tuner = self.tuner
+        tuner.queries += 1
+        tuner.scanned += scanned
+        tuner.found += found
+        return neighbors
+
+class FarFieldNode:
+    __slots__ = ("x", "y", "size", "children", "members", "boids", "boid_x", "boid_y", "boid_vx", "boid_vy",
+                 "predators", "predator_x", "predator_y")
+
+class FarFieldTree:
+    def __init__(self, boids, predators):
+        members = [(boid, False) for boid in boids if boid.is_alive]
+        members += [(predator, True) for predator in predators if predator.is_alive]
+        self.nodes = 0
+        self.root = self._build(members, 0.0, 0.0, float(max(WIDTH, HEIGHT)), 0)
+
+    def _build(self, members, x, y, size, depth):
+        node = FarFieldNode()
+        node.x, node.y, node.size = x, y, size
+        node.boids = node.predators = 0
+        node.boid_x = node.boid_y = node.boid_vx = node.boid_vy = 0.0
+        node.predator_x = node.predator_y = 0.0
+        self.nodes += 1
+        if len(members) <= FAR_FIELD_LEAF_SIZE or depth >= FAR_FIELD_MAX_DEPTH:
+            node.children = None
+            node.members = members
+            for entity, is_predator in members:
+                position = entity.position
+                if is_predator:
+                    node.predators += 1
+                    node.predator_x += position.x
+                    node.predator_y += position.y
+                else:
+                    node.boids += 1
+                    node.boid_x += position.x
+                    node.boid_y += position.y
+                    node.boid_vx += entity.velocity.x
+                    node.boid_vy += entity.velocity.y
+            return node
+        half = size / 2
+        quadrants = ([], [], [], [])
+        for member in members:
+            position = member[0].position
+            quadrants[(position.x >= x + half) + 2 * (position.y >= y + half)].append(member)
+        node.members = None
+        node.children = [self._build(quadrant, x + half * (index & 1), y + half * (index >> 1), half, depth + 1)
+                         for index, quadrant in enumerate(quadrants) if quadrant]
+        for child in node.children:
+            node.boids += child.boids
+            node.boid_x += child.boid_x
+            node.boid_y += child.boid_y
+            node.boid_vx += child.boid_vx
+            node.boid_vy += child.boid_vy
+            node.predators += child.predators
+            node.predator_x += child.predator_x
+            node.predator_y += child.predator_y
+        return node
+
+    def gather(self, position, near, far, perception):
+        # Sums over boids and predators at distances in [near, far) into the perception's far_* fields.
+        # Nodes reaching inside the near radius are always opened, so the exact near field is never
+        # counted twice; an accepted node is taken whole when its centroid lies inside the far radius.
+        px, py = position.x, position.y
+        near_sq = near * near
+        far_sq = far * far
+        angle_sq = FAR_FIELD_OPENING_ANGLE * FAR_FIELD_OPENING_ANGLE
+        boids = predators = 0
+        boid_x = boid_y = boid_vx = boid_vy = predator_x = predator_y = 0.0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            dx = max(node.x - px, 0.0, px - node.x - node.size)
+            dy = max(node.y - py, 0.0, py - node.y - node.size)
+            closest_sq = dx * dx + dy * dy
+            if closest_sq >= far_sq:
+                continue
+            if closest_sq >= near_sq and node.size * node.size < angle_sq * closest_sq:
+                mass = node.boids + node.predators
+                cx = (node.boid_x + node.predator_x) / mass - px
+                cy = (node.boid_y + node.predator_y) / mass - py
+                if cx * cx + cy * cy < far_sq:
+                    boids += node.boids
+                    boid_x += node.boid_x
+                    boid_y += node.boid_y
+                    boid_vx += node.boid_vx
+                    boid_vy += node.boid_vy
+                    predators += node.predators
+                    predator_x += node.predator_x
+                    predator_y += node.predator_y
+            elif node.children is not None:
+                stack.extend(node.children)
+            else:
+                for entity, is_predator in node.members:
+                    other = entity.position
+                    ex = other.x - px
+                    ey = other.y - py
+                    distance_sq = ex * ex + ey * ey
+                    if near_sq <= distance_sq < far_sq:
+                        if is_predator:
+                            predators += 1
+                            predator_x += other.x
+                            predator_y += other.y
+                        else:
+                            boids += 1
+                            boid_x += other.x
+                            boid_y += other.y
+                            boid_vx += entity.velocity.x
+                            boid_vy += entity.velocity.y
+        perception.far_boids = boids
+        perception.far_x = boid_x
+        perception.far_y = boid_y
+        perception.far_vx = boid_vx
+        perception.far_vy = boid_vy
+        perception.far_predators = predators
+        perception.far_px = predator_x
+        perception.far_py = predator_y
+
+class NeighborLists:
+    def __init__(self, skin=NEIGHBOR_SKIN):
+        self.skin = skin
+        self.steps = {}
+        self.rebuilds = 0
+        self.reuses = 0
+
+    def begin_tick(self, pool):
+        # Largest distance moved since last tick by anything ending up in each cell; spawns and
+        # boundary wrap-arounds count as infinite or world-sized moves and invalidate nearby lists.
+        steps = {}
+        for members in pool.members.values():
+            for entity in members:
+                last = entity.last_position
+                if last is None:
+                    entity.last_position = Vector2(entity.position)
+                    step = float('inf')
+                else:
+                    step = last.distance_to(entity.position)
+                    last.update(entity.position)
+                if step:
+                    cell = get_grid_cell(entity.position)
+                    if step > steps.get(cell, 0):
+                        steps[cell] = step
+        self.steps = steps
+
+    def max_step_near(self, position, reach):
+        cell = get_grid_cell(position)
+        cell_check_radius = math.ceil(reach / GRID_CELL_SIZE)
+        steps = self.steps
+        largest = 0
+        for i in range(cell[0] - cell_check_radius, cell[0] + cell_check_radius + 1):
+            for j in range(cell[1] - cell_check_radius, cell[1] + cell_check_radius + 1):
+                step = steps.get((i, j))
+                if step is not None and step > largest:
+                    largest = step
+        return largest
+
+    def candidates(self, agent, grid):
+        half_skin = self.skin / 2
+        interactions = INTERACTIONS[agent.species]
+        reach = max(radius for _, radius in interactions.values()) + self.skin * 1.5
+        if agent.neighbor_cache is not None:
+            agent.neighbor_drift += self.max_step_near(agent.position, reach)
+            if agent.neighbor_drift <= half_skin and agent.position.distance_to(agent.neighbor_anchor) <= half_skin:
+                self.reuses += 1
+                return agent.neighbor_cache
+        agent.neighbor_cache = {species: get_neighbors_from_grid(agent.position, radius + self.skin, grid, species)
+                                for species, (_, radius) in interactions.items()}
+        agent.neighbor_anchor = Vector2(agent.position)
+        agent.neighbor_drift = 0.0
+        self.rebuilds += 1
+        return agent.neighbor_cache
+
+class Perception:
+    # Each agent keeps one and refills it every tick; forces are accumulated as x/y scalars so the
+    # neighbor loops create no vectors.
+    __slots__ = ("flock_count", "flock_vx", "flock_vy", "flock_x", "flock_y", "separation_x", "separation_y",
+                 "distress_x", "distress_y", "flee_x", "flee_y", "avoid_x", "avoid_y", "closest_food",
+                 "food_distance", "closest_water", "water_distance", "closest_prey", "prey_distance", "distances",
+                 "far_boids", "far_x", "far_y", "far_vx", "far_vy", "far_predators", "far_px", "far_py")
+
+    def __init__(self):
+        self.distances = []
+        self.reset()
+
+    def reset(self):
+        self.flock_count = 0
+        self.flock_vx = self.flock_vy = 0.0
+        self.flock_x = self.flock_y = 0.0
+        self.separation_x = self.separation_y = 0.0
+        self.distress_x = self.distress_y = 0.0
+        self.flee_x = self.flee_y = 0.0
+        self.avoid_x = self.avoid_y = 0.0
+        self.far_boids = self.far_predators = 0
+        self.far_x = self.far_y = self.far_vx = self.far_vy = self.far_px = self.far_py = 0.0
+        self.closest_food = None
+        self.food_distance = float('inf')
+        self.closest_water = None
+        self.water_distance = float('inf')
+        self.closest_prey = None
+        self.prey_distance = float('inf')
+
+def under_threat(entity, radius, grid):
+    if not STEERING_CACHE_ENABLED:
+        return bool(get_neighbors_from_grid(entity.position, radius, grid, "predator"))
+    if entity.threat_tick != frame_count:
+        entity.threat_tick = frame_count
+        entity.threatened = bool(get_neighbors_from_grid(entity.position, radius, grid, "predator"))
+    return entity.threatened
+
+def interact_flock(agent, other, distance, radius, grid, perception):
+    perception.flock_count += 1
+    velocity = other.velocity
+    position = other.position
+    perception.flock_vx += velocity.x
+    perception.flock_vy += velocity.y
+    perception.flock_x += position.x
+    perception.flock_y += position.y
+    if distance < agent.separation_radius:
+        dx = agent.position.x - position.x
+        dy = agent.position.y - position.y
+        if distance > 0:
+            scale = 1 / distance
+            dx = dx / distance * scale
+            dy = dy / distance * scale
+        perception.separation_x += dx
+        perception.separation_y += dy
+    if agent.distress_radius and distance > 0 and \
+       (other.threat_mark if TWO_PHASE_TICK_ENABLED else under_threat(other, agent.distress_radius, grid)):
+        perception.distress_x += (agent.position.x - position.x) / distance
+        perception.distress_y += (agent.position.y - position.y) / distance
+
+def interact_flee(agent, other, distance, radius, grid, perception):
+    x, y = agent.avoid(other.position, distance, radius)
+    perception.flee_x += x
+    perception.flee_y += y
+    if distance < radius * 0.8 and agent.dialogue_timer <= 0:
+        agent.start_dialogue(status="predator")
+
+def eat_food(agent, food):
+    food.die("eaten")
+    agent.energy = min(agent.max_energy, agent.energy + food.energy_value)
+    if agent.dialogue_timer <= 0:
+        agent.start_dialogue(status="food")
+
+def drink_water(agent, water, amount):
+    # Claims are sized at sensing time, so an agent inside two overlapping sources is clamped here.
+    thirst_gained = min(amount, agent.max_thirst - agent.thirst, water.water_level)
+    agent.thirst += thirst_gained
+    water.water_level -= thirst_gained
+    if agent.dialogue_timer <= 0:
+        agent.start_dialogue(status="water")
+
+def interact_eat(agent, other, distance, radius, grid, perception):
+    if distance < perception.food_distance:
+        perception.food_distance = distance
+        perception.closest_food = other
+        agent.memory["last_food"] = other.position
+    if distance < agent.size + other.size / 2 and other.is_alive:
+        if TWO_PHASE_TICK_ENABLED:
+            agent.pool.intents.meals.append((agent, other, distance))
+        else:
+            eat_food(agent, other)
+
+def interact_drink(agent, other, distance, radius, grid, perception):
+    if distance < perception.water_distance:
+        perception.water_distance = distance
+        perception.closest_water = other
+        agent.memory["last_water"] = other.position
+    if distance < other.size and other.water_level > 0:
+        wanted = min(agent.max_thirst - agent.thirst, WATER_THIRST_GAIN_RATE * SIM_SPEED)
+        if TWO_PHASE_TICK_ENABLED:
+            agent.pool.intents.drinks.append((agent, other, wanted))
+        else:
+            drink_water(agent, other, wanted)
+
+def interact_seek(agent, other, distance, radius, grid, perception):
+    if distance < perception.prey_distance:
+        perception.prey_distance = distance
+        perception.closest_prey = other
+        if distance < radius * 0.6 and agent.dialogue_timer <= 0:
+            agent.start_dialogue(status="target")
+
+def interact_avoid(agent, other, distance, radius, grid, perception):
+    x, y = agent.avoid(other.position, distance, other.size + agent.size)
+    perception.avoid_x += x
+    perception.avoid_y += y
+
+INTERACTION_RULES = {
+    "flock": interact_flock,
+    "flee": interact_flee,
+    "eat": interact_eat,
+    "drink": interact_drink,
+    "seek": interact_seek,
+    "avoid": interact_avoid,
+}
+
+class IntentLedger:
+    # Claims recorded while agents sense. Each batch is settled in entity_id order: a boid claimed by
+    # several predators goes to the closest one, a food item to its closest claimant still alive, and a
+    # water source holding less than its drinkers want this tick is shared in proportion to their wants.
+    # Boids also post whether a predator is within their distress radius, which flockmates read on the
+    # next tick. Contacts with sick agents are recorded as agents act and settled once all have acted, so
+    # an agent infected this tick only passes it on from the next.
+    def __init__(self):
+        self.kills = []
+        self.meals = []
+        self.drinks = []
+        self.threats = []
+        self.contacts = []
+
+    def resolve(self, particles):
+        self.kills.sort(key=lambda claim: (claim[1].entity_id, claim[2], claim[0].entity_id))
+        for predator, boid, _ in self.kills:
+            if boid.is_alive and predator.is_alive:
+                predator.devour(boid, particles)
+        self.meals.sort(key=lambda claim: (claim[1].entity_id, claim[2], claim[0].entity_id))
+        for agent, food, _ in self.meals:
+            if food.is_alive and agent.is_alive:
+                eat_food(agent, food)
+        self.drinks.sort(key=lambda claim: (claim[1].entity_id, claim[0].entity_id))
+        for water, claims in itertools.groupby(self.drinks, key=lambda claim: claim[1]):
+            claims = [claim for claim in claims if claim[0].is_alive]
+            wanted = sum(amount for _, _, amount in claims)
+            share = min(1.0, water.water_level / wanted) if wanted > 0 else 0.0
+            for agent, _, amount in claims:
+                drink_water(agent, water, amount * share)
+        for boid, threatened in self.threats:
+            boid.threat_mark = threatened
+        self.kills.clear()
+        self.meals.clear()
+        self.drinks.clear()
+        self.threats.clear()
+
+    def resolve_contacts(self):
+        self.contacts.sort(key=lambda contact: (contact[0].entity_id, contact[1].entity_id))
+        for entity, _ in self.contacts:
+            if entity.is_alive and not entity.is_sick:
+                entity.catch_sickness()
+        self.contacts.clear()
+
+class PackBlackboard:
+    __slots__ = ("count", "x", "y", "vx", "vy", "targets")
+
+    def __init__(self, members, grid):
+        self.count = len(members)
+        x = y = vx = vy = 0.0
+        for member in members:
+            x += member.position.x
+            y += member.position.y
+            vx += member.velocity.x
+            vy += member.velocity.y
+        self.x, self.y, self.vx, self.vy = x, y, vx, vy
+        self.targets = {}
+        chased = set()
+        distances = []
+        for member in sorted(members, key=lambda member: member.entity_id):
+            free = shared = None
+            free_distance = shared_distance = PREDATOR_PERCEPTION_RADIUS
+            distances.clear()
+            for boid, distance in zip(grid.query(member.position, PREDATOR_PERCEPTION_RADIUS, "boid", distances), distances):
+                if not boid.is_alive:
+                    continue
+                if distance < shared_distance:
+                    shared, shared_distance = boid, distance
+                if distance < free_distance and boid.handle not in chased:
+                    free, free_distance = boid, distance
+            if free is not None:
+                chased.add(free.handle)
+                self.targets[member.handle] = free
+            elif shared is not None:
+                self.targets[member.handle] = shared
+
+    def target(self, predator):
+        # The distance is measured now: without the two-phase tick, boids move between the blackboard
+        # being built and a predator reading it.
+        boid = self.targets.get(predator.handle)
+        if boid is None:
+            return None, float('inf')
+        return boid, predator.position.distance_to(boid.position)
+
+class PackRegistry:
+    # Single-linkage clustering of predators into packs, plus the blackboards built from them each tick.
+    # Predators born since the last clustering hunt alone until the next one.
+    def __init__(self):
+        self.membership = {}
+        self.clustered_tick = None
+        self.boards = {}
+
+    def cluster(self, predators, grid):
+        parent = {predator.handle: predator.handle for predator in predators}
+
+        def find(handle):
+            while parent[handle] != handle:
+                parent[handle] = parent[parent[handle]]
+                handle = parent[handle]
+            return handle
+
+        for predator in predators:
+            for other in grid.query(predator.position, PACK_LINK_RADIUS, "predator"):
+                if other.handle in parent:
+                    root, other_root = find(predator.handle), find(other.handle)
+                    if root != other_root:
+                        parent[max(root, other_root)] = min(root, other_root)
+        self.membership = {handle: find(handle) for handle in parent}
+        self.clustered_tick = frame_count
+
+    def refresh(self, predators, grid):
+        predators = [predator for predator in predators if predator.is_alive]
+        if self.clustered_tick is None or frame_count - self.clustered_tick >= PACK_CLUSTER_INTERVAL:
+            self.cluster(predators, grid)
+        packs = {}
+        for predator in predators:
+            packs.setdefault(self.membership.get(predator.handle, predator.handle), []).append(predator)
+        self.boards = {}
+        for members in packs.values():
+            board = PackBlackboard(members, grid)
+            for member in members:
+                self.boards[member.handle] = board
+
+    def board(self, predator, grid):
+        board = self.boards.get(predator.handle)
+        if board is None:
+            board = self.boards[predator.handle] = PackBlackboard([predator], grid)
+        return board
+
+class SteeringScheduler:
+    # Per-tick gate in front of each agent's steering pass (see Steering Time-Slicing); counts how many
+    # passes ran, how many reused an older force and how old that force was.
+    def __init__(self):
+        self.urgent = self.deferrable = 0
+        self.refreshed = self.reused = self.deferred = 0
+        self.staleness_total = self.staleness_max = 0
+
+    def begin_tick(self):
+        self.urgent = self.deferrable = 0
+
+    def run(self, agent, grid, steer, *args):
+        urgent = True
+        if agent.steering_tick is not None:
+            age = frame_count - agent.steering_tick
+            interval = agent.steering_interval(grid)
+            urgent = interval == 1 or age >= STEERING_MAX_STALENESS
+            if not urgent and (age < interval or self.deferrable >= STEERING_REFRESH_BUDGET):
+                if age >= interval:
+                    self.deferred += 1
+                self.reused += 1
+                self.staleness_total += age
+                self.staleness_max = max(self.staleness_max, age)
+                agent.accelerate(*agent.steering_force)
+                return
+        steer(*args)
+        agent.steering_tick = frame_count
+        self.refreshed += 1
+        if urgent:
+            self.urgent += 1
+        else:
+            self.deferrable += 1
+
+    def summary(self):
+        # urgent_refreshes is this tick's unbounded work; deferrable_refreshes never exceeds the budget.
+        passes = max(1, self.refreshed + self.reused)
+        return {"refreshed": round(self.refreshed / passes, 3), "deferred": self.deferred,
+                "mean_staleness": round(self.staleness_total / passes, 3), "max_staleness": self.staleness_max,
+                "urgent_refreshes": self.urgent, "deferrable_refreshes": self.deferrable,
+                "refresh_budget": STEERING_REFRESH_BUDGET}
+
+def geometric_wait(chance):
+    # Ticks until the next success of a per-tick Bernoulli(chance) trial, counting the current tick as 1.
+    if chance >= 1:
+        return 1
+    return 1 + int(math.log(1.0 - random.random()) / math.log(1.0 - chance))
+
+class TimerWheel:
+    def __init__(self, size=TIMER_WHEEL_SIZE):
+        self.size = size
+        self.slots = [[] for _ in range(size)]
+        self.tick = 0
+        self.pending = 0
+
+    def schedule(self, delay, entry):
+        due = self.tick + delay
+        self.slots[due % self.size].append((due, entry))
+        self.pending += 1
+
+    def advance(self):
+        index = self.tick % self.size
+        slot = self.slots[index]
+        fired = [entry for due, entry in slot if due <= self.tick]
+        if fired:
+            self.slots[index] = [item for item in slot if item[0] > self.tick]
+            self.pending -= len(fired)
+        self.tick += 1
+        return fired
+
+_entity_ids = itertools.count(1)
+
+class LazyVital:
+    # Data descriptor for a vital stat; reading it first settles the owner's decay up to the current tick.
+    def __set_name__(self, owner, name):
+        self.field = "_" + name
+
+    def __get__(self, entity, owner=None):
+        if entity is None:
+            return self
+        if entity.vitals_tick != frame_count:
+            entity.settle_vitals()
+        return entity.__dict__[self.field]
+
+    def __set__(self, entity, value):
+        if entity.vitals_tick != frame_count:
+            entity.settle_vitals()
+        lowered = value < entity.__dict__.get(self.field, value)
+        entity.__dict__[self.field] = value
+        if lowered and entity.lazy_vitals:
+            # Only a drop can bring the next crossing forward; a queued entry that turns out early just
+            # reschedules when it fires.
+            entity.schedule_vital_event()
+
+class VitalSchedule:
+    def __init__(self):
+        self.queue = []
+        self.serials = itertools.count()
+        self.compact_size = VITALS_QUEUE_COMPACT_SIZE
+
+    def schedule(self, entity, tick):
+        entity.vitals_due = tick
+        entity.vitals_serial = next(self.serials)
+        heapq.heappush(self.queue, (tick, entity.vitals_serial, entity))
+        if len(self.queue) > self.compact_size:
+            # Every reschedule leaves a stale entry behind; drop them before they pile up.
+            self.queue = [item for item in self.queue if item[1] == item[2].vitals_serial and item[2].is_alive]
+            heapq.heapify(self.queue)
+            self.compact_size = max(VITALS_QUEUE_COMPACT_SIZE, len(self.queue) * 2)
+
+    def pop_due(self, tick):
+        due = []
+        heap = self.queue
+        while heap and heap[0][0] <= tick:
+            _, serial, entity = heapq.heappop(heap)
+            if serial == entity.vitals_serial and entity.is_alive:
+                entity.vitals_due = None
+                due.append(entity)
+        return due
 
 class Entity:
-    def __init__(self, x, y, color, max_speed, max_force, size,
-                 start_energy, energy_decay, max_energy,
-                 start_health, health_decay, max_health,
-                 start_thirst, thirst_decay, max_thirst, max_age,
-                 aged_speed_penalty_factor, aged_health_penalty_factor):
+    energy = LazyVital()
+    health = LazyVital()
+    thirst = LazyVital()
+    age = LazyVital()
+
+    def __init__(self, x, y, species, velocity=None):
+        params = SPECIES[species]
+        self.species = species
+        self.pool = None
+        self.is_alive = True
+        self.lazy_vitals = False
+        self.vitals_tick = frame_count
+        self.vital_rates = (0.0, 0.0, 0.0)
+        self.vitals_serial = -1
+        self.vitals_due = None
+        self.reproduction_ready = True
+        self.entity_id = next(_entity_ids)
         self.position = Vector2(x, y)
-        self.velocity = Vector2(random.uniform(-1, 1), random.uniform(-1, 1)).normalize() * random.uniform(max_speed / 2, max_speed)
+        if velocity is None:
+            velocity = Vector2(random.uniform(-1, 1), random.uniform(-1, 1)).normalize() * random.uniform(params["max_speed"] / 2, params["max_speed"])
+        self.velocity = velocity
         self.acceleration = Vector2(0, 0)
-        self.color = color
-        self.max_speed = max_speed
-        self.max_force = max_force
-        self.size = size
-        self.energy = start_energy
-        self.energy_decay_rate = energy_decay
-        self.max_energy = max_energy
-        self.health = start_health
-        self.health_decay_rate = health_decay
-        self.max_health = max_health
-        self.thirst = start_thirst
-        self.thirst_decay_rate = thirst_decay
-        self.max_thirst = max_thirst
+        self.color = params["color"]
+        self.max_speed = params["max_speed"]
+        self.max_force = params["max_force"]
+        self.size = params["size"]
+        self.energy = params["start_energy"]
+        self.energy_decay_rate = params["energy_decay"]
+        self.max_energy = params["max_energy"]
+        self.health = params["start_health"]
+        self.health_decay_rate = params["health_decay"]
+        self.max_health = params["max_health"]
+        self.thirst = params["start_thirst"]
+        self.thirst_decay_rate = params["thirst_decay"]
+        self.max_thirst = params["max_thirst"]
         self.age = 0
-        self.max_age = max_age
-        self.aged_speed_penalty_factor = aged_speed_penalty_factor
-        self.aged_health_penalty_factor = aged_health_penalty_factor
-        self.is_alive = True
+        self.max_age = params["max_age"]
+        self.aged_speed_penalty_factor = params["aged_speed_penalty_factor"]
+        self.aged_health_penalty_factor = params["aged_health_penalty_factor"]
+        self.separation_radius = params.get("separation_radius", 0)
+        self.distress_radius = params.get("distress_radius")
+        self.dialogues = params.get("dialogues", ())
+        self.memory = {"last_food": None, "last_water": None}
         self.dialogue_timer = 0
         self.current_dialogue = ""
         self.is_sick = False
         self.sickness_duration = 0
+        self.sickness_end = 0
+        self.infection_exposure = 0.0
+        self.infection_threshold = None
+        self.dialogue_scheduled = False
+        self.handle = None
+        self.member_index = -1
+        self.death_cause = None
+        self.birth_tick = 0
+        self.vitals_bins = None
+        self.last_position = None
+        self.neighbor_cache = None
+        self.neighbor_anchor = None
+        self.neighbor_drift = 0.0
+        self.perception = Perception()
+        self.speed_tick = None
+        self.age_speed_factor = 1.0
+        self.threat_tick = None
+        self.threatened = False
+        self.threat_mark = False
+        self.steering_tick = None
+        self.steering_force = (0.0, 0.0)
+        self.sick_contact_tick = None
+        self.lazy_vitals = LAZY_VITALS_ENABLED and species in VITAL_SPECIES
 
-    def update(self, all_entities, grid, particles):
+    def die(self, cause="unknown"):
+        if self.is_alive:
+            self.is_alive = False
+            self.death_cause = cause
+            if self.pool is not None:
+                self.pool.mark_dead(self)
+
+    def vital_death_cause(self):
+        if self.age >= self.max_age * 0.9:
+            return "age"
+        if self.energy <= 0:
+            return "energy"
+        if self.health <= 0:
+            return "health"
+        if self.thirst <= 0:
+            return "thirst"
+        return "age"
+
+    def update(self, pool, grid, particles):
         if not self.is_alive:
             return
         self.velocity += self.acceleration * SIM_SPEED
@@ -275,6 +1262,33 @@ class Entity:
         self.position += self.velocity * SIM_SPEED
         self.acceleration *= 0
         self.handle_boundaries()
+        if not self.lazy_vitals:
+            self.decay_vitals()
+        if self.is_sick:
+            neighbors = get_neighbors_from_grid(self.position, SICKNESS_TRANSMISSION_RADIUS, grid, SUSCEPTIBLE_SPECIES)
+            for entity in neighbors:
+                if entity is not self and entity.is_alive and not entity.is_sick:
+                    if TWO_PHASE_TICK_ENABLED:
+                        pool.intents.contacts.append((entity, self))
+                    else:
+                        entity.catch_sickness()
+        if not self.lazy_vitals:
+            if self.is_sick and self.sickness_duration <= 0:
+                self.is_sick = False
+            if self.energy <= 0 or self.health <= 0 or self.thirst <= 0 or self.age >= self.max_age:
+                self.die(self.vital_death_cause())
+        if EVENT_SAMPLING_ENABLED and not self.dialogue_scheduled:
+            self.dialogue_scheduled = True
+            timers.schedule(geometric_wait(DIALOGUE_CANDIDATE_CHANCE), ("dialogue", self))
+        if self.dialogue_timer > 0:
+            self.dialogue_timer -= SIM_SPEED
+            if self.dialogue_timer <= 0:
+                self.current_dialogue = ""
+        elif not EVENT_SAMPLING_ENABLED:
+            if random.random() < self.dialogue_chance():
+                self.start_dialogue()
+
+    def decay_vitals(self):
         self.age += SIM_SPEED
         self.energy = max(0, self.energy - self.energy_decay_rate * SIM_SPEED)
         self.thirst = max(0, self.thirst - self.thirst_decay_rate * SIM_SPEED)
@@ -285,40 +1299,127 @@ class Entity:
         if self.is_sick:
             self.sickness_duration -= SIM_SPEED
             self.health -= SICKNESS_HEALTH_IMPACT * SIM_SPEED
-            neighbors = get_neighbors_from_grid(self.position, SICKNESS_TRANSMISSION_RADIUS, grid)
-            for entity in neighbors:
-                if entity is not self and entity.is_alive and not entity.is_sick and isinstance(entity, (Boid, Predator)):
-                    if random.random() < SICKNESS_CHANCE_PER_FRAME_NEAR_SICK:
-                        entity.contract_sickness()
-            if self.sickness_duration <= 0:
-                self.is_sick = False
-        if self.energy <= 0 or self.health <= 0 or self.thirst <= 0 or self.age >= self.max_age:
-            self.is_alive = False
-        if self.dialogue_timer > 0:
-            self.dialogue_timer -= SIM_SPEED
-            if self.dialogue_timer <= 0:
-                self.current_dialogue = ""
+
+    def settle_vitals(self):
+        elapsed = frame_count - self.vitals_tick
+        self.vitals_tick = frame_count
+        if not self.lazy_vitals or elapsed <= 0:
+            return
+        ticks = round(elapsed / SIM_SPEED)
+        energy_rate, thirst_rate, health_rate = self.vital_rates
+        age = self._age
+        self._age = age + ticks * SIM_SPEED
+        self._energy = max(0, self._energy - energy_rate * ticks)
+        self._thirst = max(0, self._thirst - thirst_rate * ticks)
+        self._health = max(0, self._health - health_rate * ticks - self.aging_loss(age, ticks))
+
+    def peek_vitals(self):
+        # Energy, thirst and health as of the current tick without settling them, so that observing a
+        # lazy entity does not change how its decay is rounded.
+        ticks = round((frame_count - self.vitals_tick) / SIM_SPEED) if self.lazy_vitals else 0
+        if ticks <= 0:
+            return self._energy, self._thirst, self._health
+        energy_rate, thirst_rate, health_rate = self.vital_rates
+        return (max(0, self._energy - energy_rate * ticks), max(0, self._thirst - thirst_rate * ticks),
+                max(0, self._health - health_rate * ticks - self.aging_loss(self._age, ticks)))
+
+    def aging_loss(self, age, ticks):
+        # Closed-form sum of the per-tick aging penalty over the next ticks, starting from age.
+        onset = self.max_age * 0.7
+        first = max(0, math.floor((onset - age) / SIM_SPEED))
+        if first >= ticks or not self.aged_health_penalty_factor:
+            return 0.0
+        head = age + (first + 1) * SIM_SPEED - onset
+        tail = age + ticks * SIM_SPEED - onset
+        return self.aged_health_penalty_factor * SIM_SPEED * (ticks - first) * (head + tail) / 2 / (self.max_age * 0.3)
+
+    def refresh_vital_rates(self):
+        # Settles at the old rates first, so callers flip is_sick or the current event before calling this.
+        if self.vitals_tick != frame_count:
+            self.settle_vitals()
+        energy_rate = self.energy_decay_rate
+        thirst_rate = self.thirst_decay_rate
+        health_rate = self.health_decay_rate
+        if self.is_sick:
+            energy_rate += self.energy_decay_rate * (1.0 - SICKNESS_ENERGY_GAIN_PENALTY_FACTOR)
+            health_rate += SICKNESS_HEALTH_IMPACT
+        if current_event == "heatwave":
+            thirst_rate += self.thirst_decay_rate * 0.8
+        elif current_event == "acid_rain":
+            health_rate += self.max_health * 0.0015
+        self.vital_rates = (energy_rate * SIM_SPEED, thirst_rate * SIM_SPEED, health_rate * SIM_SPEED)
+        self.schedule_vital_event()
+
+    def schedule_vital_event(self):
+        if self.pool is not None and self.is_alive:
+            due = frame_count + self.ticks_to_vital_event() * SIM_SPEED
+            if self.vitals_due is None or due < self.vitals_due:
+                self.pool.vitals.schedule(self, due)
+
+    def ticks_to_vital_event(self):
+        energy_rate, thirst_rate, health_rate = self.vital_rates
+        ticks = max(1, math.ceil((self.max_age - self._age) / SIM_SPEED))
+        if energy_rate > 0:
+            ticks = min(ticks, max(1, math.ceil(self._energy / energy_rate)))
+        if thirst_rate > 0:
+            ticks = min(ticks, max(1, math.ceil(self._thirst / thirst_rate)))
+        health, age = self._health, self._age
+        if health - health_rate * ticks - self.aging_loss(age, ticks) <= 0:
+            low, high = 0, ticks
+            while high - low > 1:
+                middle = (low + high) // 2
+                if health - health_rate * middle - self.aging_loss(age, middle) <= 0:
+                    high = middle
+                else:
+                    low = middle
+            ticks = max(1, high)
+        if self.is_sick:
+            ticks = min(ticks, max(1, math.ceil((self.sickness_end - frame_count) / SIM_SPEED)))
+        if not self.reproduction_ready:
+            ticks = min(ticks, max(1, math.ceil((self.reproduction_tick() - frame_count) / SIM_SPEED)))
+        return ticks
+
+    def on_vital_event(self):
+        if self.vitals_tick != frame_count:
+            self.settle_vitals()
+        if self.is_sick and frame_count >= self.sickness_end:
+            self.is_sick = False
+        if not self.reproduction_ready and frame_count >= self.reproduction_tick():
+            self.reproduction_ready = True
+        if self._energy <= 0 or self._health <= 0 or self._thirst <= 0 or self._age >= self.max_age:
+            self.die(self.vital_death_cause())
         else:
-            base_chance = DIALOGUE_CHANCE_BASE * SIM_SPEED
-            status_chance = 0
-            if self.is_sick:
-                status_chance = DIALOGUE_CHANCE_STATUS * SIM_SPEED
-            elif self.energy < self.max_energy * 0.4:
-                status_chance = DIALOGUE_CHANCE_STATUS * SIM_SPEED
-            elif self.health < self.max_health * 0.4:
-                status_chance = DIALOGUE_CHANCE_STATUS * SIM_SPEED
-            elif self.thirst < self.max_thirst * 0.4:
-                status_chance = DIALOGUE_CHANCE_STATUS * SIM_SPEED
-            elif self.age > self.max_age * 0.8:
-                status_chance = DIALOGUE_CHANCE_STATUS * SIM_SPEED
-            if random.random() < base_chance + status_chance:
-                self.start_dialogue()
+            self.refresh_vital_rates()
+
+    def reproduction_tick(self):
+        return frame_count
+
+    def dialogue_chance(self):
+        base_chance = DIALOGUE_CHANCE_BASE * SIM_SPEED
+        status_chance = 0
+        energy, thirst, health = self.peek_vitals()
+        if self.is_sick:
+            status_chance = DIALOGUE_CHANCE_STATUS * SIM_SPEED
+        elif energy < self.max_energy * 0.4:
+            status_chance = DIALOGUE_CHANCE_STATUS * SIM_SPEED
+        elif health < self.max_health * 0.4:
+            status_chance = DIALOGUE_CHANCE_STATUS * SIM_SPEED
+        elif thirst < self.max_thirst * 0.4:
+            status_chance = DIALOGUE_CHANCE_STATUS * SIM_SPEED
+        elif self.age > self.max_age * 0.8:
+            status_chance = DIALOGUE_CHANCE_STATUS * SIM_SPEED
+        return base_chance + status_chance
 
     def get_speed_multiplier(self):
-        age_penalty_mult = 1.0
-        if self.age > self.max_age * 0.7:
-            age_factor = (self.age - self.max_age * 0.7) / (self.max_age * 0.3)
-            age_penalty_mult = 1.0 - (age_factor * (1.0 - self.aged_speed_penalty_factor))
+        # Age only moves between ticks, so its factor is worked out once per tick.
+        if self.speed_tick != frame_count:
+            age_penalty_mult = 1.0
+            if self.age > self.max_age * 0.7:
+                age_factor = (self.age - self.max_age * 0.7) / (self.max_age * 0.3)
+                age_penalty_mult = 1.0 - (age_factor * (1.0 - self.aged_speed_penalty_factor))
+            self.speed_tick = frame_count
+            self.age_speed_factor = age_penalty_mult
+        age_penalty_mult = self.age_speed_factor
         sickness_penalty_mult = SICKNESS_SPEED_PENALTY_FACTOR if self.is_sick else 1.0
         return age_penalty_mult * sickness_penalty_mult
 
@@ -326,32 +1427,86 @@ class Entity:
         if not self.is_sick:
             self.is_sick = True
             self.sickness_duration = random.uniform(SICKNESS_DURATION_MIN, SICKNESS_DURATION_MAX)
+            if self.lazy_vitals:
+                self.sickness_end = frame_count + math.ceil(self.sickness_duration / SIM_SPEED) * SIM_SPEED
+                self.refresh_vital_rates()
             if self.dialogue_timer <= 0:
                 self.start_dialogue(status="sick")
 
+    def catch_sickness(self):
+        # One contact with a sick neighbor this tick.
+        self.sick_contact_tick = frame_count
+        if EVENT_SAMPLING_ENABLED:
+            self.expose_to_sickness()
+        elif random.random() < SICKNESS_CHANCE_PER_FRAME_NEAR_SICK:
+            self.contract_sickness()
+
+    def expose_to_sickness(self):
+        # Cumulative hazard: surviving n contacts has probability (1 - p)^n, exactly as n separate rolls,
+        # but only one random draw is spent per infection.
+        if self.infection_threshold is None:
+            self.infection_threshold = -math.log(1.0 - random.random())
+        self.infection_exposure += SICKNESS_HAZARD_PER_CONTACT
+        if self.infection_exposure >= self.infection_threshold:
+            self.infection_exposure = 0.0
+            self.infection_threshold = None
+            self.contract_sickness()
+
+    def perceive(self, grid):
+        perception = self.perception
+        perception.reset()
+        distances = perception.distances
+        cached = None
+        if NEIGHBOR_LISTS_ENABLED and self.pool is not None:
+            cached = self.pool.neighbor_lists.candidates(self, grid)
+        for species, (rule, radius) in (PACK_INTERACTIONS if PACK_COORDINATION_ENABLED else INTERACTIONS)[self.species].items():
+            interact = INTERACTION_RULES[rule]
+            if cached is None:
+                distances.clear()
+                for entity, distance in zip(get_neighbors_from_grid(self.position, radius, grid, species, distances), distances):
+                    if entity is not self and entity.is_alive:
+                        interact(self, entity, distance, radius, grid, perception)
+                continue
+            for entity in cached[species]:
+                if entity is not self and entity.is_alive:
+                    distance = self.position.distance_to(entity.position)
+                    if distance < radius:
+                        interact(self, entity, distance, radius, grid, perception)
+        if FAR_FIELD_ENABLED:
+            grid.far_field().gather(self.position, INTERACTIONS[self.species][self.species][1], FAR_FIELD_RADIUS, perception)
+        return perception
+
     def apply_force(self, force):
         self.acceleration += force
 
+    def accelerate(self, x, y):
+        acceleration = self.acceleration
+        acceleration.x += x
+        acceleration.y += y
+
+    def steer(self, dx, dy, length, speed_multiplier=1.0):
+        # Desired velocity at full speed along (dx, dy), whose length is already known, minus the
+        # current velocity and clamped to max_force; returned as an (x, y) pair.
+        x = dx / length * self.max_speed * speed_multiplier - self.velocity.x
+        y = dy / length * self.max_speed * speed_multiplier - self.velocity.y
+        magnitude = math.sqrt(x * x + y * y)
+        if magnitude > self.max_force:
+            scale = self.max_force / magnitude
+            return x * scale, y * scale
+        return x, y
+
     def seek(self, target_pos):
-        desired = target_pos - self.position
-        if desired.length() == 0:
-            return Vector2(0, 0)
-        desired = desired.normalize() * self.max_speed * self.get_speed_multiplier()
-        steer = desired - self.velocity
-        if steer.length() > self.max_force:
-            steer.scale_to_length(self.max_force)
-        return steer
-
-    def avoid(self, target_pos, avoidance_radius):
-        steer = Vector2(0, 0)
-        distance = self.position.distance_to(target_pos)
+        dx = target_pos.x - self.position.x
+        dy = target_pos.y - self.position.y
+        length = math.sqrt(dx * dx + dy * dy)
+        if length == 0:
+            return 0.0, 0.0
+        return self.steer(dx, dy, length, self.get_speed_multiplier())
+
+    def avoid(self, target_pos, distance, avoidance_radius):
         if distance > 0 and distance < avoidance_radius:
-            desired = self.position - target_pos
-            desired = desired.normalize() * self.max_speed * self.get_speed_multiplier()
-            steer = desired - self.velocity
-            if steer.length() > self.max_force:
-                steer.scale_to_length(self.max_force)
-        return steer
+            return self.steer(self.position.x - target_pos.x, self.position.y - target_pos.y, distance, self.get_speed_multiplier())
+        return 0.0, 0.0
 
     def handle_boundaries(self):
         if self.position.x < 0:
@@ -365,7 +1520,7 @@ class Entity:
 
     def start_dialogue(self, status=None):
         self.dialogue_timer = DIALOGUE_DURATION
-        dialogues = BOID_DIALOGUES if isinstance(self, Boid) else PREDATOR_DIALOGUES
+        dialogues = self.dialogues
         if status == "sick" and "Sick..." in dialogues:
             self.current_dialogue = "Sick..."
         elif status == "predator" and "Predator!" in dialogues:
@@ -398,172 +1553,183 @@ class Entity:
                 screen.blit(text_surface, text_rect)
 
 class Boid(Entity):
-    def __init__(self, x, y):
-        super().__init__(x, y, BOID_COLOR, MAX_BOID_SPEED, MAX_BOID_FORCE, BOID_SIZE,
-                         BOID_START_ENERGY, BOID_ENERGY_DECAY, BOID_MAX_ENERGY,
-                         BOID_START_HEALTH, BOID_HEALTH_DECAY, BOID_MAX_HEALTH,
-                         BOID_START_THIRST, BOID_THIRST_DECAY, BOID_MAX_THIRST, BOID_MAX_AGE,
-                         BOID_AGED_SPEED_PENALTY_FACTOR, BOID_AGED_HEALTH_PENALTY_FACTOR)
+    def __init__(self, x, y, velocity=None):
+        super().__init__(x, y, "boid", velocity)
         self.last_reproduction_time = 0
+        self.reproduction_ready = not self.lazy_vitals
         self.state = "foraging"  # foraging, resting, fleeing
-        self.memory = {"last_food": None, "last_water": None}
         self.state_timer = random.uniform(100, 300)
 
-    def update(self, all_entities_list, grid, particles):
+    def update(self, pool, grid, particles):
         if not self.is_alive:
             self.spawn_particles(particles, self.color)
             return None
         new_boid = None
-        self.update_state(all_entities_list, grid)
-        self.flock(all_entities_list, grid)
-        super().update(all_entities_list, grid, particles)
-        if self.is_sick:
+        if not TWO_PHASE_TICK_ENABLED:
+            self.sense(pool, grid, particles)
+        super().update(pool, grid, particles)
+        if self.is_sick and not self.lazy_vitals:
             self.energy -= self.energy_decay_rate * (1.0 - SICKNESS_ENERGY_GAIN_PENALTY_FACTOR) * SIM_SPEED
-        if len([b for b in all_entities_list if isinstance(b, Boid) and b.is_alive]) < MAX_BOIDS and \
+        if self.reproduction_ready and \
+           pool.count(Boid) < MAX_BOIDS and \
            not self.is_sick and \
            self.age >= BOID_MIN_REPRODUCTION_AGE and \
            self.energy >= BOID_REPRODUCTION_ENERGY_COST and \
            self.thirst >= BOID_MAX_THIRST * 0.5 and \
            self.health >= BOID_MAX_HEALTH * 0.7 and \
-           (pygame.time.get_ticks() - self.last_reproduction_time) / (1000 / FPS) >= BOID_REPRODUCTION_COOLDOWN * (1/SIM_SPEED):
-            nearby_boids = get_neighbors_from_grid(self.position, self.size * 5, grid, Boid)
+           frame_count - self.last_reproduction_time >= BOID_REPRODUCTION_COOLDOWN:
+            nearby_boids = get_neighbors_from_grid(self.position, self.size * 5, grid, "boid")
             has_nearby_mate = any(other_boid.is_alive and other_boid is not self for other_boid in nearby_boids)
             if has_nearby_mate or random.random() < 0.002 * SIM_SPEED:
                 new_boid = Boid(self.position.x + random.uniform(-self.size*2, self.size*2), self.position.y + random.uniform(-self.size*2, self.size*2))
+                self.last_reproduction_time = frame_count
+                self.reproduction_ready = not self.lazy_vitals
                 self.energy -= BOID_REPRODUCTION_ENERGY_COST
                 self.thirst -= BOID_REPRODUCTION_THIRST_COST
                 self.health -= BOID_REPRODUCTION_HEALTH_COST
-                self.last_reproduction_time = pygame.time.get_ticks()
         return new_boid
 
-    def update_state(self, all_entities_list, grid):
+    def sense(self, pool, grid, particles):
+        if TWO_PHASE_TICK_ENABLED:
+            # Flockmates read this mark from the last commit rather than probing each other's surroundings.
+            pool.intents.threats.append((self, under_threat(self, self.distress_radius, grid)))
+        self.update_state(pool, grid)
+        if STEERING_SLICING_ENABLED:
+            pool.steering.run(self, grid, self.flock, pool, grid)
+        else:
+            self.flock(pool, grid)
+
+    def steering_interval(self, grid):
+        perception = self.perception
+        if self.is_sick or self.state == "fleeing" or perception.flee_x or perception.flee_y or \
+           perception.distress_x or perception.distress_y or \
+           perception.closest_food is not None or perception.closest_water is not None or \
+           (self.sick_contact_tick is not None and frame_count - self.sick_contact_tick < STEERING_CALM_INTERVAL) or \
+           under_threat(self, self.distress_radius, grid):
+            # The last check is live: a predator that has just come into range is caught this tick. The
+            # distress radius covers the flee radius and shares the per-tick threat cache with flockmates.
+            return 1
+        return STEERING_CALM_INTERVAL if self.state == "resting" else STEERING_FLOCK_INTERVAL
+
+    def reproduction_tick(self):
+        return max(frame_count + BOID_MIN_REPRODUCTION_AGE - self.age, self.last_reproduction_time + BOID_REPRODUCTION_COOLDOWN)
+
+    def update_state(self, pool, grid):
         self.state_timer -= SIM_SPEED
         if self.state_timer <= 0:
-            predators_near = get_neighbors_from_grid(self.position, BOID_PERCEPTION_RADIUS * 1.2, grid, Predator)
+            predators_near = get_neighbors_from_grid(self.position, BOID_PERCEPTION_RADIUS * 1.2, grid, "predator")
+            energy, thirst, _ = self.peek_vitals()
             if predators_near:
                 self.state = "fleeing"
-            elif self.energy > self.max_energy * 0.8 and self.thirst > self.max_thirst * 0.8:
+            elif energy > self.max_energy * 0.8 and thirst > self.max_thirst * 0.8:
                 self.state = "resting"
             else:
                 self.state = "foraging"
             self.state_timer = random.uniform(100, 300)
 
-    def flock(self, all_entities_list, grid):
-        sep = Vector2(0, 0)
-        ali = Vector2(0, 0)
-        coh = Vector2(0, 0)
-        flee_predator = Vector2(0, 0)
-        seek_food = Vector2(0, 0)
-        seek_water = Vector2(0, 0)
-        avoid_obstacle = Vector2(0, 0)
-        total_nearby_boids = 0
-        avg_position_boids = Vector2(0, 0)
-        avg_velocity_boids = Vector2(0, 0)
-        fleeing_neighbors_flee_force = Vector2(0, 0)
-        closest_food = None
-        min_food_dist = float('inf')
-        closest_water = None
-        min_water_dist = float('inf')
-        neighbors = get_neighbors_from_grid(self.position, max(BOID_PERCEPTION_RADIUS, SICKNESS_TRANSMISSION_RADIUS), grid)
-        for entity in neighbors:
-            if entity is self or not entity.is_alive:
-                continue
-            distance = self.position.distance_to(entity.position)
-            if isinstance(entity, Boid) and distance < BOID_PERCEPTION_RADIUS:
-                total_nearby_boids += 1
-                avg_velocity_boids += entity.velocity
-                avg_position_boids += entity.position
-                if distance < BOID_SEPARATION_RADIUS:
-                    diff = self.position - entity.position
-                    if distance > 0:
-                        diff = diff.normalize() / distance
-                    sep += diff
-                predators_near_neighbor = get_neighbors_from_grid(entity.position, PREDATOR_PERCEPTION_RADIUS * 0.8, grid, Predator)
-                if predators_near_neighbor:
-                    fleeing_neighbors_flee_force += (self.position - entity.position).normalize()
-            elif isinstance(entity, Predator):
-                flee_vector = self.avoid(entity.position, BOID_PERCEPTION_RADIUS * 1.2)
-                flee_predator += flee_vector
-                if distance < BOID_PERCEPTION_RADIUS * 0.8 and self.dialogue_timer <= 0:
-                    self.start_dialogue(status="predator")
-            elif isinstance(entity, Food):
-                if distance < min_food_dist:
-                    min_food_dist = distance
-                    closest_food = entity
-                    self.memory["last_food"] = entity.position
-                if distance < self.size + entity.size / 2:
-                    if entity.is_alive:
-                        entity.is_alive = False
-                        self.energy = min(self.max_energy, self.energy + entity.energy_value)
-                        if self.dialogue_timer <= 0:
-                            self.start_dialogue(status="food")
-            elif isinstance(entity, WaterSource):
-                if distance < min_water_dist:
-                    min_water_dist = distance
-                    closest_water = entity
-                    self.memory["last_water"] = entity.position
-                if distance < entity.size:
-                    if entity.water_level > 0:
-                        thirst_gained = min(self.max_thirst - self.thirst, WATER_THIRST_GAIN_RATE * SIM_SPEED, entity.water_level)
-                        self.thirst += thirst_gained
-                        entity.water_level -= thirst_gained
-                        if self.dialogue_timer <= 0:
-                            self.start_dialogue(status="water")
-            elif isinstance(entity, Obstacle):
-                avoid_vector = self.avoid(entity.position, entity.size + self.size)
-                avoid_obstacle += avoid_vector
+    def flock(self, pool, grid):
+        ali_x = ali_y = coh_x = coh_y = 0.0
+        food_x = food_y = water_x = water_y = 0.0
+        perception = self.perceive(grid)
+        sep_x = perception.separation_x
+        sep_y = perception.separation_y
+        total_nearby_boids = perception.flock_count
+        closest_food = perception.closest_food
+        closest_water = perception.closest_water
         if total_nearby_boids > 0:
-            avg_velocity_boids /= total_nearby_boids
-            ali = avg_velocity_boids.normalize() * self.max_speed
-            ali = ali - self.velocity
-            if ali.length() > self.max_force:
-                ali.scale_to_length(self.max_force)
-            avg_position_boids /= total_nearby_boids
-            coh = avg_position_boids - self.position
-            coh = coh.normalize() * self.max_speed
-            coh = coh - self.velocity
-            if coh.length() > self.max_force:
-                coh.scale_to_length(self.max_force)
-        if sep.length() > 0:
-            sep = sep.normalize() * self.max_speed
-            sep = sep - self.velocity
-            if sep.length() > self.max_force:
-                sep.scale_to_length(self.max_force)
-        if self.state == "fleeing":
-            seek_food *= 0.1
-            seek_water *= 0.1
-        elif self.state == "resting":
-            sep *= 0.5
-            ali *= 0.5
-            coh *= 0.5
-            seek_food *= 0.2
-            seek_water *= 0.2
+            inverse = 1 / total_nearby_boids
+            avg_vx = perception.flock_vx * inverse
+            avg_vy = perception.flock_vy * inverse
+            ali_x, ali_y = self.steer(avg_vx, avg_vy, math.sqrt(avg_vx * avg_vx + avg_vy * avg_vy))
+            coh_dx = perception.flock_x * inverse - self.position.x
+            coh_dy = perception.flock_y * inverse - self.position.y
+            coh_x, coh_y = self.steer(coh_dx, coh_dy, math.sqrt(coh_dx * coh_dx + coh_dy * coh_dy))
+        sep_length = math.sqrt(sep_x * sep_x + sep_y * sep_y)
+        if sep_length > 0:
+            sep_x, sep_y = self.steer(sep_x, sep_y, sep_length)
+        if self.state == "resting":
+            sep_x *= 0.5
+            sep_y *= 0.5
+            ali_x *= 0.5
+            ali_y *= 0.5
+            coh_x *= 0.5
+            coh_y *= 0.5
         elif self.state == "foraging":
-            if self.thirst < self.max_thirst * 0.7:
+            energy, thirst, _ = self.peek_vitals()
+            if thirst < self.max_thirst * 0.7:
                 if closest_water and closest_water.water_level > 0:
-                    seek_water = self.seek(closest_water.position)
+                    water_x, water_y = self.seek(closest_water.position)
                 elif self.memory["last_water"]:
-                    seek_water = self.seek(self.memory["last_water"]) * 0.5
-                if self.thirst < self.max_thirst * 0.3:
-                    seek_food *= 0.2
-            elif self.energy < self.max_energy * 0.7:
+                    water_x, water_y = self.seek(self.memory["last_water"])
+                    water_x *= 0.5
+                    water_y *= 0.5
+            elif energy < self.max_energy * 0.7:
                 if closest_food:
-                    seek_food = self.seek(closest_food.position)
+                    food_x, food_y = self.seek(closest_food.position)
                 elif self.memory["last_food"]:
-                    seek_food = self.seek(self.memory["last_food"]) * 0.5
-                if self.energy < self.max_energy * 0.3:
-                    seek_water *= 0.2
-        final_force = sep * BOID_SEPARATION_WEIGHT + \
-                      ali * BOID_ALIGNMENT_WEIGHT + \
-                      coh * BOID_COHESION_WEIGHT + \
-                      avoid_obstacle * BOID_AVOID_OBSTACLE_WEIGHT
-        effective_flee_predator = flee_predator
-        if fleeing_neighbors_flee_force.length() > 0:
-            effective_flee_predator += fleeing_neighbors_flee_force.normalize() * BOID_DISTRESS_AMPLIFICATION * self.max_force
-        final_force += effective_flee_predator * BOID_FLEE_PREDATOR_WEIGHT
-        final_force += seek_food * BOID_SEEK_FOOD_WEIGHT
-        final_force += seek_water * BOID_SEEK_WATER_WEIGHT
-        self.apply_force(final_force)
+                    food_x, food_y = self.seek(self.memory["last_food"])
+                    food_x *= 0.5
+                    food_y *= 0.5
+        force_x = sep_x * BOID_SEPARATION_WEIGHT + ali_x * BOID_ALIGNMENT_WEIGHT + \
+                  coh_x * BOID_COHESION_WEIGHT + perception.avoid_x * BOID_AVOID_OBSTACLE_WEIGHT
+        force_y = sep_y * BOID_SEPARATION_WEIGHT + ali_y * BOID_ALIGNMENT_WEIGHT + \
+                  coh_y * BOID_COHESION_WEIGHT + perception.avoid_y * BOID_AVOID_OBSTACLE_WEIGHT
+        flee_x = perception.flee_x
+        flee_y = perception.flee_y
+        distress_x = perception.distress_x
+        distress_y = perception.distress_y
+        distress_length = math.sqrt(distress_x * distress_x + distress_y * distress_y)
+        if distress_length > 0:
+            flee_x += distress_x / distress_length * BOID_DISTRESS_AMPLIFICATION * self.max_force
+            flee_y += distress_y / distress_length * BOID_DISTRESS_AMPLIFICATION * self.max_force
+        force_x += flee_x * BOID_FLEE_PREDATOR_WEIGHT
+        force_y += flee_y * BOID_FLEE_PREDATOR_WEIGHT
+        force_x += food_x * BOID_SEEK_FOOD_WEIGHT
+        force_y += food_y * BOID_SEEK_FOOD_WEIGHT
+        force_x += water_x * BOID_SEEK_WATER_WEIGHT
+        force_y += water_y * BOID_SEEK_WATER_WEIGHT
+        if FAR_FIELD_ENABLED:
+            far_x, far_y = self.far_field_force(perception)
+            force_x += far_x
+            force_y += far_y
+        if STEERING_SLICING_ENABLED:
+            self.steering_force = (force_x, force_y)
+        self.accelerate(force_x, force_y)
+
+    def far_field_force(self, perception):
+        # Faint pull towards the heading and centre of boids beyond the perception radius, and a push
+        # away from the centroid of distant predators; near neighbours stay in charge when present.
+        force_x = force_y = 0.0
+        boids = perception.far_boids
+        if boids > 0:
+            inverse = 1 / boids
+            avg_vx = perception.far_vx * inverse
+            avg_vy = perception.far_vy * inverse
+            length = math.sqrt(avg_vx * avg_vx + avg_vy * avg_vy)
+            if length > 0:
+                ali_x, ali_y = self.steer(avg_vx, avg_vy, length)
+                force_x += ali_x * FAR_FIELD_ALIGNMENT_WEIGHT
+                force_y += ali_y * FAR_FIELD_ALIGNMENT_WEIGHT
+            dx = perception.far_x * inverse - self.position.x
+            dy = perception.far_y * inverse - self.position.y
+            length = math.sqrt(dx * dx + dy * dy)
+            if length > 0:
+                coh_x, coh_y = self.steer(dx, dy, length)
+                force_x += coh_x * FAR_FIELD_COHESION_WEIGHT
+                force_y += coh_y * FAR_FIELD_COHESION_WEIGHT
+        predators = perception.far_predators
+        if predators > 0:
+            dx = self.position.x - perception.far_px / predators
+            dy = self.position.y - perception.far_py / predators
+            length = math.sqrt(dx * dx + dy * dy)
+            if length > 0:
+                flee_x, flee_y = self.steer(dx, dy, length)
+                force_x += flee_x * FAR_FIELD_THREAT_WEIGHT
+                force_y += flee_y * FAR_FIELD_THREAT_WEIGHT
+        if perception.flock_count > 0:
+            force_x *= 0.5
+            force_y *= 0.5
+        return force_x, force_y
 
     def spawn_particles(self, particles, color):
         for _ in range(5):
@@ -603,150 +1769,191 @@ class Boid(Entity):
         super().draw(screen, font, camera)
 
 class Predator(Entity):
-    def __init__(self, x, y):
-        super().__init__(x, y, PREDATOR_COLOR, MAX_PREDATOR_SPEED, MAX_PREDATOR_FORCE, PREDATOR_SIZE,
-                         PREDATOR_START_ENERGY, PREDATOR_ENERGY_DECAY, PREDATOR_MAX_ENERGY,
-                         PREDATOR_START_HEALTH, PREDATOR_HEALTH_DECAY, PREDATOR_MAX_HEALTH,
-                         PREDATOR_START_THIRST, PREDATOR_THIRST_DECAY, PREDATOR_MAX_THIRST, PREDATOR_MAX_AGE,
-                         PREDATOR_AGED_SPEED_PENALTY_FACTOR, PREDATOR_AGED_HEALTH_PENALTY_FACTOR)
+    def __init__(self, x, y, velocity=None):
+        super().__init__(x, y, "predator", velocity)
         self.boids_eaten_for_reproduction = 0
         self.last_reproduction_time = 0
+        self.reproduction_ready = not self.lazy_vitals
         self.state = "hunting"  # hunting, stalking, resting
         self.state_timer = random.uniform(100, 300)
-        self.target_boid = None
+        self.target_handle = None
 
-    def update(self, all_entities_list, grid, particles):
+    def update(self, pool, grid, particles):
         if not self.is_alive:
             self.spawn_particles(particles, self.color)
             return None
         new_predator = None
-        self.update_state(all_entities_list, grid)
-        self.hunt(all_entities_list, grid, particles)
-        super().update(all_entities_list, grid, particles)
-        if self.is_sick:
+        if not TWO_PHASE_TICK_ENABLED:
+            self.sense(pool, grid, particles)
+        super().update(pool, grid, particles)
+        if self.is_sick and not self.lazy_vitals:
             self.energy -= self.energy_decay_rate * (1.0 - SICKNESS_ENERGY_GAIN_PENALTY_FACTOR) * SIM_SPEED
-        if len([p for p in all_entities_list if isinstance(p, Predator) and p.is_alive]) < MAX_PREDATORS and \
+        if self.reproduction_ready and \
+           pool.count(Predator) < MAX_PREDATORS and \
            not self.is_sick and \
            self.boids_eaten_for_reproduction >= PREDATOR_BOIDS_EATEN_FOR_REPRODUCTION and \
            self.energy >= PREDATOR_START_ENERGY * 0.8 and \
            self.thirst >= PREDATOR_MAX_THIRST * 0.6 and \
            self.health >= PREDATOR_MAX_HEALTH * 0.8 and \
-           (pygame.time.get_ticks() - self.last_reproduction_time) / (1000 / FPS) >= PREDATOR_REPRODUCTION_COOLDOWN * (1/SIM_SPEED):
+           frame_count - self.last_reproduction_time >= PREDATOR_REPRODUCTION_COOLDOWN:
             new_predator = Predator(self.position.x + random.uniform(-self.size*3, self.size*3), self.position.y + random.uniform(-self.size*3, self.size*3))
             self.boids_eaten_for_reproduction = 0
+            self.last_reproduction_time = frame_count
+            self.reproduction_ready = not self.lazy_vitals
             self.energy -= PREDATOR_START_ENERGY * 0.5
             self.thirst -= PREDATOR_MAX_THIRST * 0.2
             self.health -= PREDATOR_MAX_HEALTH * 0.1
-            self.last_reproduction_time = pygame.time.get_ticks()
         return new_predator
 
-    def update_state(self, all_entities_list, grid):
+    def sense(self, pool, grid, particles):
+        self.update_state(pool, grid)
+        if STEERING_SLICING_ENABLED:
+            pool.steering.run(self, grid, self.hunt, pool, grid, particles)
+        else:
+            self.hunt(pool, grid, particles)
+
+    def steering_interval(self, grid):
+        if self.state != "resting" or self.is_sick:
+            return 1
+        # Drinking and kills are claimed from the steering pass, so a resting predator still steers every
+        # tick while water or a boid is close enough to reach before its next calm refresh. Both checks are
+        # live grid queries at fixed radii, which share their plans across predators.
+        closing = SIM_SPEED * STEERING_CALM_INTERVAL
+        for water in grid.query(self.position, WATER_SIZE + MAX_PREDATOR_SPEED * closing, "water"):
+            if water.water_level > 0:
+                return 1
+        for boid in grid.query(self.position, PREDATOR_SIZE + BOID_SIZE / 2 + (MAX_PREDATOR_SPEED + MAX_BOID_SPEED) * closing, "boid"):
+            if boid.is_alive:
+                return 1
+        return STEERING_CALM_INTERVAL
+
+    def reproduction_tick(self):
+        return self.last_reproduction_time + PREDATOR_REPRODUCTION_COOLDOWN
+
+    def update_state(self, pool, grid):
         self.state_timer -= SIM_SPEED
         if self.state_timer <= 0:
-            boids_near = get_neighbors_from_grid(self.position, PREDATOR_PERCEPTION_RADIUS, grid, Boid)
-            if boids_near and self.energy < self.max_energy * 0.9:
+            distances = self.perception.distances
+            distances.clear()
+            if PACK_COORDINATION_ENABLED:
+                target, distance = pool.packs.board(self, grid).target(self)
+                boids_near = [] if target is None else [target]
+                distances.append(distance)
+            else:
+                boids_near = get_neighbors_from_grid(self.position, PREDATOR_PERCEPTION_RADIUS, grid, "boid", distances)
+            if boids_near and self.peek_vitals()[0] < self.max_energy * 0.9:
                 min_dist = float('inf')
-                for boid in boids_near:
-                    dist = self.position.distance_to(boid.position)
+                for boid, dist in zip(boids_near, distances):
                     if dist < min_dist:
                         min_dist = dist
-                        self.target_boid = boid
+                        self.target_handle = boid.handle
                 if min_dist > PREDATOR_PERCEPTION_RADIUS * 0.5:
                     self.state = "stalking"
                 else:
                     self.state = "hunting"
             else:
                 self.state = "resting"
-                self.target_boid = None
+                self.target_handle = None
             self.state_timer = random.uniform(100, 300)
 
-    def hunt(self, all_entities_list, grid, particles):
-        seek_force = Vector2(0, 0)
-        avoid_obstacle = Vector2(0, 0)
-        sep_predator = Vector2(0, 0)
-        ali_predator = Vector2(0, 0)
-        coh_predator = Vector2(0, 0)
-        seek_water = Vector2(0, 0)
-        target_boid = self.target_boid
+    def hunt(self, pool, grid, particles):
+        seek_x = seek_y = water_x = water_y = 0.0
+        target_boid = pool.get(self.target_handle)
         min_boid_dist = float('inf')
-        nearby_predators_count = 0
-        avg_velocity_predators = Vector2(0, 0)
-        avg_position_predators = Vector2(0, 0)
-        neighbors = get_neighbors_from_grid(self.position, max(PREDATOR_PERCEPTION_RADIUS, SICKNESS_TRANSMISSION_RADIUS), grid)
-        for entity in neighbors:
-            if entity is self or not entity.is_alive:
-                continue
-            distance = self.position.distance_to(entity.position)
-            if isinstance(entity, Boid) and distance < PREDATOR_PERCEPTION_RADIUS:
-                if distance < min_boid_dist:
-                    min_boid_dist = distance
-                    target_boid = entity
-                    if distance < PREDATOR_PERCEPTION_RADIUS * 0.6 and self.dialogue_timer <= 0:
-                        self.start_dialogue(status="target")
-            elif isinstance(entity, Predator) and distance < PREDATOR_PERCEPTION_RADIUS:
-                nearby_predators_count += 1
-                avg_velocity_predators += entity.velocity
-                avg_position_predators += entity.position
-                if distance < PREDATOR_SEPARATION_RADIUS:
-                    diff = self.position - entity.position
-                    if distance > 0:
-                        diff = diff.normalize() / distance
-                    sep_predator += diff
-            elif isinstance(entity, WaterSource):
-                if distance < entity.size and entity.water_level > 0:
-                    thirst_gained = min(self.max_thirst - self.thirst, WATER_THIRST_GAIN_RATE * SIM_SPEED, entity.water_level)
-                    self.thirst += thirst_gained
-                    entity.water_level -= thirst_gained
-                    if self.dialogue_timer <= 0:
-                        self.start_dialogue(status="water")
-            elif isinstance(entity, Obstacle):
-                avoid_vector = self.avoid(entity.position, entity.size + self.size)
-                avoid_obstacle += avoid_vector
+        perception = self.perceive(grid)
+        if PACK_COORDINATION_ENABLED:
+            # Packmates stand in for the predators in sight: alignment and cohesion use the whole pack
+            # minus this predator, and the target is the one the blackboard assigned.
+            board = pool.packs.board(self, grid)
+            nearby_predators_count = board.count - 1
+            flock_vx = board.vx - self.velocity.x
+            flock_vy = board.vy - self.velocity.y
+            flock_x = board.x - self.position.x
+            flock_y = board.y - self.position.y
+            assigned, distance = board.target(self)
+            if assigned is not None:
+                target_boid = assigned
+                min_boid_dist = distance
+                if distance < PREDATOR_PERCEPTION_RADIUS * 0.6 and self.dialogue_timer <= 0:
+                    self.start_dialogue(status="target")
+        else:
+            nearby_predators_count = perception.flock_count
+            flock_vx, flock_vy = perception.flock_vx, perception.flock_vy
+            flock_x, flock_y = perception.flock_x, perception.flock_y
+            if perception.closest_prey is not None:
+                target_boid = perception.closest_prey
+                min_boid_dist = perception.prey_distance
         if target_boid and target_boid.is_alive:
-            self.target_boid = target_boid
+            self.target_handle = target_boid.handle
             speed_factor = 0.6 if self.state == "stalking" else 1.0
-            seek_force = self.seek(target_boid.position) * speed_factor
+            seek_x, seek_y = self.seek(target_boid.position)
+            seek_x *= speed_factor
+            seek_y *= speed_factor
             if min_boid_dist < self.size + target_boid.size / 2:
-                target_boid.is_alive = False
-                self.energy = min(self.max_energy, self.energy + PREDATOR_BOID_ENERGY)
-                self.boids_eaten_for_reproduction += 1
-                self.spawn_particles(particles, target_boid.color)
-                self.state = "resting"
-                self.state_timer = random.uniform(50, 150)
-        if self.thirst < self.max_thirst * 0.5 and not (target_boid and min_boid_dist < PREDATOR_PERCEPTION_RADIUS * 0.8):
+                if TWO_PHASE_TICK_ENABLED:
+                    pool.intents.kills.append((self, target_boid, min_boid_dist))
+                else:
+                    self.devour(target_boid, particles)
+        elif FAR_FIELD_ENABLED and perception.far_boids > 0 and self.state == "hunting":
+            # Nothing in sight: drift towards the densest distant prey rather than wandering.
+            dx = perception.far_x / perception.far_boids - self.position.x
+            dy = perception.far_y / perception.far_boids - self.position.y
+            length = math.sqrt(dx * dx + dy * dy)
+            if length > 0:
+                seek_x, seek_y = self.steer(dx, dy, length, self.get_speed_multiplier())
+                seek_x *= FAR_FIELD_PREY_WEIGHT
+                seek_y *= FAR_FIELD_PREY_WEIGHT
+        if self.peek_vitals()[1] < self.max_thirst * 0.5 and not (target_boid and min_boid_dist < PREDATOR_PERCEPTION_RADIUS * 0.8):
             closest_water_predator = None
             min_water_dist_predator = float('inf')
-            water_sources = get_neighbors_from_grid(self.position, PREDATOR_PERCEPTION_RADIUS * 1.5, grid, WaterSource)
-            for water in water_sources:
-                if water.water_level > 0:
-                    dist = self.position.distance_to(water.position)
-                    if dist < min_water_dist_predator:
-                        min_water_dist_predator = dist
-                        closest_water_predator = water
+            distances = perception.distances
+            distances.clear()
+            water_sources = get_neighbors_from_grid(self.position, PREDATOR_PERCEPTION_RADIUS * 1.5, grid, "water", distances)
+            for water, dist in zip(water_sources, distances):
+                if water.water_level > 0 and dist < min_water_dist_predator:
+                    min_water_dist_predator = dist
+                    closest_water_predator = water
             if closest_water_predator:
-                seek_water = self.seek(closest_water_predator.position)
+                water_x, water_y = self.seek(closest_water_predator.position)
                 if min_water_dist_predator < PREDATOR_PERCEPTION_RADIUS * 0.5 and self.dialogue_timer <= 0:
                     self.start_dialogue(status="water")
         if self.state == "resting":
-            seek_force *= 0.2
-            seek_water *= 0.5
-        final_force = avoid_obstacle * PREDATOR_AVOID_OBSTACLE_WEIGHT + \
-                      sep_predator * PREDATOR_SEPARATION_WEIGHT + \
-                      seek_force * PREDATOR_SEEK_BOID_WEIGHT + \
-                      seek_water * PREDATOR_SEEK_WATER_WEIGHT
+            seek_x *= 0.2
+            seek_y *= 0.2
+            water_x *= 0.5
+            water_y *= 0.5
+        force_x = perception.avoid_x * PREDATOR_AVOID_OBSTACLE_WEIGHT + perception.separation_x * PREDATOR_SEPARATION_WEIGHT + \
+                  seek_x * PREDATOR_SEEK_BOID_WEIGHT + water_x * PREDATOR_SEEK_WATER_WEIGHT
+        force_y = perception.avoid_y * PREDATOR_AVOID_OBSTACLE_WEIGHT + perception.separation_y * PREDATOR_SEPARATION_WEIGHT + \
+                  seek_y * PREDATOR_SEEK_BOID_WEIGHT + water_y * PREDATOR_SEEK_WATER_WEIGHT
         if nearby_predators_count > 0 and self.state == "hunting":
-            avg_velocity_predators /= nearby_predators_count
-            avg_position_predators /= nearby_predators_count
-            ali_predator = avg_velocity_predators.normalize() * self.max_speed - self.velocity if avg_velocity_predators.length() > 0 else Vector2(0, 0)
-            coh_predator = avg_position_predators - self.position
-            coh_predator = coh_predator.normalize() * self.max_speed - self.velocity if coh_predator.length() > 0 else Vector2(0, 0)
-            if ali_predator.length() > self.max_force:
-                ali_predator.scale_to_length(self.max_force)
-            if coh_predator.length() > self.max_force:
-                coh_predator.scale_to_length(self.max_force)
-            final_force += ali_predator * PREDATOR_FLOCKING_WEIGHT
-            final_force += coh_predator * PREDATOR_FLOCKING_WEIGHT
-        self.apply_force(final_force)
+            ali_x = ali_y = coh_x = coh_y = 0.0
+            inverse = 1 / nearby_predators_count
+            avg_vx = flock_vx * inverse
+            avg_vy = flock_vy * inverse
+            ali_length = math.sqrt(avg_vx * avg_vx + avg_vy * avg_vy)
+            if ali_length > 0:
+                ali_x, ali_y = self.steer(avg_vx, avg_vy, ali_length)
+            coh_dx = flock_x * inverse - self.position.x
+            coh_dy = flock_y * inverse - self.position.y
+            coh_length = math.sqrt(coh_dx * coh_dx + coh_dy * coh_dy)
+            if coh_length > 0:
+                coh_x, coh_y = self.steer(coh_dx, coh_dy, coh_length)
+            force_x += ali_x * PREDATOR_FLOCKING_WEIGHT
+            force_y += ali_y * PREDATOR_FLOCKING_WEIGHT
+            force_x += coh_x * PREDATOR_FLOCKING_WEIGHT
+            force_y += coh_y * PREDATOR_FLOCKING_WEIGHT
+        if STEERING_SLICING_ENABLED:
+            self.steering_force = (force_x, force_y)
+        self.accelerate(force_x, force_y)
+
+    def devour(self, boid, particles):
+        boid.die("predator")
+        self.energy = min(self.max_energy, self.energy + PREDATOR_BOID_ENERGY)
+        self.boids_eaten_for_reproduction += 1
+        self.spawn_particles(particles, boid.color)
+        self.state = "resting"
+        self.state_timer = random.uniform(50, 150)
 
     def spawn_particles(self, particles, color):
         for _ in range(7):
@@ -786,21 +1993,21 @@ class Predator(Entity):
         super().draw(screen, font, camera)
 
 class Food(Entity):
-    def __init__(self, x, y):
-        super().__init__(x, y, FOOD_COLOR, 0, 0, FOOD_SIZE, 0, 0, 0, 1, 0, 1, 1, 0, 1, 1, 0, 0)
+    def __init__(self, x, y, velocity=None):
+        super().__init__(x, y, "food", velocity)
         self.velocity = Vector2(0, 0)
         self.acceleration = Vector2(0, 0)
         self.energy_value = FOOD_ENERGY_VALUE
         self.age = 0
 
-    def update(self, all_entities_list, grid, particles):
+    def update(self, pool, grid, particles):
         if not self.is_alive:
             return
         self.age += SIM_SPEED
         if self.age >= FOOD_DECAY_START_AGE:
             self.health -= FOOD_DECAY_RATE * SIM_SPEED
             if self.health <= 0:
-                self.is_alive = False
+                self.die("decayed")
 
     def draw(self, screen, font, camera):
         if not self.is_alive:
@@ -810,14 +2017,14 @@ class Food(Entity):
             pygame.draw.circle(screen, self.color, (int(pos.x), int(pos.y)), self.size * camera.zoom)
 
 class WaterSource(Entity):
-    def __init__(self, x, y):
-        super().__init__(x, y, WATER_COLOR, 0, 0, WATER_SIZE, 0, 0, 0, 1, 0, 1, 1, 0, 1, 1, 0, 0)
+    def __init__(self, x, y, velocity=None):
+        super().__init__(x, y, "water", velocity)
         self.velocity = Vector2(0, 0)
         self.acceleration = Vector2(0, 0)
         self.water_level = WATER_START_LEVEL
         self.replenish_timer = random.uniform(0, 300)
 
-    def update(self, all_entities_list, grid, particles):
+    def update(self, pool, grid, particles):
         if not self.is_alive:
             return
         if self.water_level < WATER_MAX_LEVEL:
@@ -827,22 +2034,35 @@ class WaterSource(Entity):
                 self.replenish_timer = 0
 
     def draw(self, screen, font, camera):
+        self.draw_outline(screen, camera)
+        self.draw_fill(screen, camera)
+
+    def draw_outline(self, screen, camera):
         if not self.is_alive:
             return
         pos = camera.apply(self.position)
         if 0 <= pos.x <= WIDTH and 0 <= pos.y <= HEIGHT:
             pygame.draw.circle(screen, self.color, (int(pos.x), int(pos.y)), self.size * camera.zoom, 1)
-            inner_size = self.size * (self.water_level / WATER_MAX_LEVEL) * camera.zoom
+
+    def fill_radius(self, camera):
+        return int(self.size * (self.water_level / WATER_MAX_LEVEL) * camera.zoom)
+
+    def draw_fill(self, screen, camera):
+        if not self.is_alive:
+            return
+        pos = camera.apply(self.position)
+        if 0 <= pos.x <= WIDTH and 0 <= pos.y <= HEIGHT:
+            inner_size = self.fill_radius(camera)
             if inner_size > 0:
-                pygame.draw.circle(screen, self.color, (int(pos.x), int(pos.y)), int(inner_size))
+                pygame.draw.circle(screen, self.color, (int(pos.x), int(pos.y)), inner_size)
 
 class Obstacle(Entity):
-    def __init__(self, x, y):
-        super().__init__(x, y, OBSTACLE_COLOR, 0, 0, OBSTACLE_SIZE, 0, 0, 0, 1, 0, 1, 1, 0, 1, 1, 0, 0)
+    def __init__(self, x, y, velocity=None):
+        super().__init__(x, y, "obstacle", velocity)
         self.velocity = Vector2(0, 0)
         self.acceleration = Vector2(0, 0)
 
-    def update(self, all_entities_list, grid, particles):
+    def update(self, pool, grid, particles):
         if not self.is_alive:
             return
 
@@ -853,20 +2073,153 @@ class Obstacle(Entity):
         if 0 <= pos.x <= WIDTH and 0 <= pos.y <= HEIGHT:
             pygame.draw.circle(screen, self.color, (int(pos.x), int(pos.y)), self.size * camera.zoom)
 
+SPAWN_SPECIES = {Boid: "boid", Predator: "predator", Food: "food", WaterSource: "water", Obstacle: "obstacle"}
+
+class ObstacleMap:
+    # Obstacles listed under every cell their keep-out disc overlaps, so a candidate position in open
+    # ground costs one dictionary miss and only those near an obstacle are measured.
+    def __init__(self, obstacles, clearance):
+        self.reach = OBSTACLE_SIZE + clearance
+        self.cell_size = self.reach / 2
+        self.cells = {}
+        for obstacle in obstacles:
+            if obstacle.is_alive:
+                x, y = obstacle.position.x, obstacle.position.y
+                for i in range(int((x - self.reach) // self.cell_size), int((x + self.reach) // self.cell_size) + 1):
+                    for j in range(int((y - self.reach) // self.cell_size), int((y + self.reach) // self.cell_size) + 1):
+                        self.cells.setdefault((i, j), []).append((x, y))
+
+    def blocked(self, x, y):
+        nearby = self.cells.get((int(x // self.cell_size), int(y // self.cell_size)))
+        if nearby is None:
+            return False
+        reach_sq = self.reach * self.reach
+        for ox, oy in nearby:
+            if (x - ox) * (x - ox) + (y - oy) * (y - oy) < reach_sq:
+                return True
+        return False
+
+def spawn_positions(count, obstacles, placement=None):
+    # Each point gets up to SPAWN_MAX_ATTEMPTS draws to land clear of obstacles (and, for "poisson", of
+    # the points already placed). A "poisson" point that never clears its neighbours settles for its last
+    # draw clear of obstacles; one that never clears an obstacle is dropped, so a crowded world can return
+    # fewer than count points.
+    positions = []
+    if count <= 0:
+        return positions
+    draw = random.random
+    placement = placement or SPAWN_PLACEMENT
+    if placement == "stratified":
+        cols = max(1, round(math.sqrt(count * WIDTH / HEIGHT)))
+        rows = math.ceil(count / cols)
+        width, height = WIDTH / cols, HEIGHT / rows
+        for cell in random.sample(range(cols * rows), count):
+            left, top = cell % cols * width, cell // cols * height
+            for _ in range(SPAWN_MAX_ATTEMPTS):
+                x, y = left + draw() * width, top + draw() * height
+                if not obstacles.blocked(x, y):
+                    positions.append((x, y))
+                    break
+            else:
+                # The cell lies under an obstacle: fall back to anywhere in the world.
+                for _ in range(SPAWN_MAX_ATTEMPTS):
+                    x, y = draw() * WIDTH, draw() * HEIGHT
+                    if not obstacles.blocked(x, y):
+                        positions.append((x, y))
+                        break
+    elif placement == "poisson":
+        spacing = SPAWN_POISSON_PACKING * math.sqrt(WIDTH * HEIGHT / count)
+        spacing_sq = spacing * spacing
+        cell_size = spacing / math.sqrt(2)  # at most one accepted point per cell
+        taken = {}
+        for _ in range(count):
+            clear = None
+            for _ in range(SPAWN_MAX_ATTEMPTS):
+                x, y = draw() * WIDTH, draw() * HEIGHT
+                if obstacles.blocked(x, y):
+                    continue
+                clear = (x, y)
+                cell = (int(x // cell_size), int(y // cell_size))
+                if cell in taken:
+                    continue
+                crowded = False
+                for i in range(cell[0] - 2, cell[0] + 3):
+                    for j in range(cell[1] - 2, cell[1] + 3):
+                        other = taken.get((i, j))
+                        if other is not None and (x - other[0]) * (x - other[0]) + (y - other[1]) * (y - other[1]) < spacing_sq:
+                            crowded = True
+                            break
+                    if crowded:
+                        break
+                if not crowded:
+                    taken[cell] = clear
+                    break
+            if clear is not None:
+                positions.append(clear)
+    else:
+        for _ in range(count):
+            for _ in range(SPAWN_MAX_ATTEMPTS):
+                x, y = draw() * WIDTH, draw() * HEIGHT
+                if not obstacles.blocked(x, y):
+                    positions.append((x, y))
+                    break
+    return positions
+
+def spawn_velocities(count, max_speed):
+    # One angle per heading instead of normalizing a random vector; speeds in [max_speed / 2, max_speed).
+    velocities = []
+    for _ in range(count):
+        angle = random.random() * math.tau
+        speed = max_speed * (0.5 + 0.5 * random.random())
+        velocities.append(Vector2(math.cos(angle) * speed, math.sin(angle) * speed))
+    return velocities
+
+def spawn_batch(pool, kind, count, placement=None):
+    if not BULK_SPAWN_ENABLED:
+        for _ in range(count):
+            pool.spawn(kind(random.uniform(0, WIDTH), random.uniform(0, HEIGHT)))
+        return
+    if count <= 0:
+        return
+    params = SPECIES[SPAWN_SPECIES[kind]]
+    positions = spawn_positions(count, ObstacleMap(pool.members[Obstacle], params["size"] + SPAWN_OBSTACLE_MARGIN), placement)
+    count = len(positions)
+    if params["max_speed"]:
+        velocities = spawn_velocities(count, params["max_speed"])
+    else:
+        velocities = [Vector2() for _ in range(count)]
+    if count < SPAWN_GC_PAUSE_MIN:
+        pool.spawn_many([kind(x, y, velocity) for (x, y), velocity in zip(positions, velocities)])
+        return
+    # Everything a large batch allocates stays alive, so the cycle collector would only rescan the
+    # growing population over and over while it is built.
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        pool.spawn_many([kind(x, y, velocity) for (x, y), velocity in zip(positions, velocities)])
+    finally:
+        if collecting:
+            gc.enable()
+
 event_timer = random.randint(int(EVENT_INTERVAL_MIN), int(EVENT_INTERVAL_MAX))
+frame_count = 0
 current_event = None
 event_duration = 0
 event_timer_countdown = 0
 story_index = 0
 story_message = STORY_EVENTS[0][1]
 story_timer = 300
+timers = TimerWheel()
+event_serial = 0
 
-def trigger_random_event(entities_dict, food_items, predators, obstacles, water_sources):
-    global current_event, event_duration, event_timer_countdown, event_timer
+def trigger_random_event(pool):
+    global current_event, event_duration, event_timer_countdown, event_timer, event_serial
+    boids, predators = pool.members[Boid], pool.members[Predator]
+    food_items, obstacles = pool.members[Food], pool.members[Obstacle]
     available_events = EVENT_TYPES[:]
-    if not entities_dict["boids"] and "sickness_outbreak" in available_events:
+    if not boids and "sickness_outbreak" in available_events:
         available_events.remove("sickness_outbreak")
-    if not entities_dict["boids"] and "predator_influx" in available_events:
+    if not boids and "predator_influx" in available_events:
         available_events.remove("predator_influx")
     if not food_items and "food_bloom" in available_events:
         available_events.remove("food_bloom")
@@ -880,8 +2233,14 @@ def trigger_random_event(entities_dict, food_items, predators, obstacles, water_
     print(f"\n--- Event Triggered: {current_event.replace('_', ' ').title()} ---")
     event_duration = random.randint(300, 800) * (1/SIM_SPEED)
     event_timer_countdown = event_duration
+    event_serial += 1
+    if LAZY_VITALS_ENABLED and current_event in VITAL_EVENTS:
+        for entity in boids + predators:
+            entity.refresh_vital_rates()
+    if EVENT_SAMPLING_ENABLED and current_event in EVENT_SPAWN_CHANCES:
+        timers.schedule(geometric_wait(EVENT_SPAWN_CHANCES[current_event]) - 1, ("event", event_serial))
     if current_event == "sickness_outbreak":
-        all_living_entities = [e for e in entities_dict["boids"] + entities_dict["predators"] if e.is_alive]
+        all_living_entities = [e for e in boids + predators if e.is_alive]
         num_to_infect = max(1, int(len(all_living_entities) * 0.08))
         for _ in range(num_to_infect):
             if all_living_entities:
@@ -892,128 +2251,849 @@ def trigger_random_event(entities_dict, food_items, predators, obstacles, water_
             if entity.dialogue_timer <= 0:
                 entity.start_dialogue(status="story")
     elif current_event == "obstacle_spawn":
-        for _ in range(random.randint(2, 5)):
-            obstacles.append(Obstacle(random.uniform(0, WIDTH), random.uniform(0, HEIGHT)))
+        spawn_batch(pool, Obstacle, min(random.randint(2, 5), max(0, OBSTACLE_MAX_COUNT - pool.count(Obstacle))))
     elif current_event == "food_bloom":
-        for entity in random.sample(entities_dict["boids"], min(5, len(entities_dict["boids"]))):
+        for entity in random.sample(boids, min(5, len(boids))):
             if entity.dialogue_timer <= 0:
                 entity.start_dialogue(status="story")
     elif current_event == "predator_influx":
-        for entity in random.sample(entities_dict["predators"], min(5, len(entities_dict["predators"]))):
+        for entity in random.sample(predators, min(5, len(predators))):
             if entity.dialogue_timer <= 0:
                 entity.start_dialogue(status="story")
 
-def handle_active_event(entities_dict, food_items, predators, obstacles, water_sources):
+def handle_active_event(pool):
     global event_timer_countdown, current_event, event_timer
     if current_event is None:
         return (255, 255, 255)
+    boids, predators = pool.members[Boid], pool.members[Predator]
     event_color = (255, 255, 255)
     if current_event == "food_bloom":
-        if len(food_items) < FOOD_MAX_COUNT * 1.5 and random.random() < 0.03 * SIM_SPEED:
-            food_items.append(Food(random.uniform(0, WIDTH), random.uniform(0, HEIGHT)))
+        if not EVENT_SAMPLING_ENABLED and pool.count(Food) < FOOD_MAX_COUNT * 1.5 and random.random() < 0.03 * SIM_SPEED:
+            spawn_batch(pool, Food, 1)
     elif current_event == "predator_influx":
-        if len(predators) < MAX_PREDATORS and random.random() < 0.004 * SIM_SPEED:
-            predators.append(Predator(random.uniform(0, WIDTH), random.uniform(0, HEIGHT)))
+        if not EVENT_SAMPLING_ENABLED and pool.count(Predator) < MAX_PREDATORS and random.random() < 0.004 * SIM_SPEED:
+            spawn_batch(pool, Predator, 1)
     elif current_event == "heatwave":
-        event_color = (255, 200, 200)
-        for entity in entities_dict["boids"] + entities_dict["predators"]:
+        event_color = EVENT_TINTS["heatwave"]
+        for entity in boids + predators:
             if entity.is_alive:
-                entity.thirst -= entity.thirst_decay_rate * 0.8 * SIM_SPEED
-                if random.random() < DIALOGUE_CHANCE_EVENT * SIM_SPEED and entity.dialogue_timer <= 0:
+                if not entity.lazy_vitals:
+                    entity.thirst -= entity.thirst_decay_rate * 0.8 * SIM_SPEED
+                if not EVENT_SAMPLING_ENABLED and random.random() < DIALOGUE_CHANCE_EVENT * SIM_SPEED and entity.dialogue_timer <= 0:
                     entity.start_dialogue(status="story")
     elif current_event == "acid_rain":
-        event_color = (200, 255, 200)
-        for entity in entities_dict["boids"] + entities_dict["predators"]:
+        event_color = EVENT_TINTS["acid_rain"]
+        for entity in boids + predators:
             if entity.is_alive:
-                entity.health -= entity.max_health * 0.0015 * SIM_SPEED
-                if random.random() < DIALOGUE_CHANCE_EVENT * SIM_SPEED and entity.dialogue_timer <= 0:
+                if not entity.lazy_vitals:
+                    entity.health -= entity.max_health * 0.0015 * SIM_SPEED
+                if not EVENT_SAMPLING_ENABLED and random.random() < DIALOGUE_CHANCE_EVENT * SIM_SPEED and entity.dialogue_timer <= 0:
                     entity.start_dialogue(status="story")
     elif current_event == "storm":
-        event_color = (200, 200, 255)
-        for entity in entities_dict["boids"] + entities_dict["predators"]:
+        event_color = EVENT_TINTS["storm"]
+        for entity in boids + predators:
             if entity.is_alive:
                 entity.apply_force(Vector2(random.uniform(-0.1, 0.1), random.uniform(-0.1, 0.1)))
-                if random.random() < DIALOGUE_CHANCE_EVENT * SIM_SPEED and entity.dialogue_timer <= 0:
+                if not EVENT_SAMPLING_ENABLED and random.random() < DIALOGUE_CHANCE_EVENT * SIM_SPEED and entity.dialogue_timer <= 0:
                     entity.start_dialogue(status="story")
     elif current_event == "obstacle_spawn":
-        if random.random() < 0.0008 * SIM_SPEED and len(obstacles) < NUM_OBSTACLES + 15:
-            obstacles.append(Obstacle(random.uniform(0, WIDTH), random.uniform(0, HEIGHT)))
+        if not EVENT_SAMPLING_ENABLED and random.random() < 0.0008 * SIM_SPEED and pool.count(Obstacle) < OBSTACLE_MAX_COUNT:
+            spawn_batch(pool, Obstacle, 1)
     event_timer_countdown -= SIM_SPEED
     if event_timer_countdown <= 0:
         print(f"--- Event {current_event.replace('_', ' ').title()} Ended ---")
+        ended_event = current_event
         current_event = None
+        if LAZY_VITALS_ENABLED and ended_event in VITAL_EVENTS:
+            for entity in boids + predators:
+                entity.refresh_vital_rates()
         event_timer = random.randint(int(EVENT_INTERVAL_MIN), int(EVENT_INTERVAL_MAX))
     return event_color
 
-class SimulationStats:
-    def __init__(self):
-        self.boid_births = 0
-        self.predator_births = 0
-        self.boid_deaths_energy = 0
-        self.boid_deaths_health = 0
-        self.boid_deaths_thirst = 0
-        self.boid_deaths_age = 0
-        self.boid_deaths_predator = 0
-        self.predator_deaths_energy = 0
-        self.predator_deaths_health = 0
-        self.predator_deaths_thirst = 0
-        self.predator_deaths_age = 0
-        self._boid_age_sum = 0
-        self._predator_age_sum = 0
-        self._boid_count_history = []
-        self._predator_count_history = []
-
-    def update(self, boids, predators):
-        if boids:
-            self._boid_age_sum = sum(b.age for b in boids)
-            self._boid_count_history.append(len(boids))
+def roll_dialogue(entity):
+    # Candidates arrive at the combined envelope rate and are thinned to the entity's current chance,
+    # so a changing status or an event starting or ending needs no rescheduling.
+    if not entity.is_alive:
+        return
+    timers.schedule(geometric_wait(DIALOGUE_CANDIDATE_CHANCE), ("dialogue", entity))
+    if entity.dialogue_timer > 0:
+        return
+    own_chance = entity.dialogue_chance()
+    event_chance = DIALOGUE_CHANCE_EVENT * SIM_SPEED if current_event in DIALOGUE_EVENTS else 0
+    roll = random.random() * DIALOGUE_CANDIDATE_CHANCE
+    if roll < own_chance:
+        entity.start_dialogue()
+    elif roll < own_chance + (1 - own_chance) * event_chance:
+        entity.start_dialogue(status="story")
+
+def roll_event_spawn(pool, serial):
+    if serial != event_serial or current_event not in EVENT_SPAWN_CHANCES:
+        return
+    timers.schedule(geometric_wait(EVENT_SPAWN_CHANCES[current_event]), ("event", serial))
+    if current_event == "food_bloom":
+        if pool.count(Food) < FOOD_MAX_COUNT * 1.5:
+            spawn_batch(pool, Food, 1)
+    elif current_event == "predator_influx":
+        if pool.count(Predator) < MAX_PREDATORS:
+            spawn_batch(pool, Predator, 1)
+    elif current_event == "obstacle_spawn":
+        if pool.count(Obstacle) < OBSTACLE_MAX_COUNT:
+            spawn_batch(pool, Obstacle, 1)
+
+def run_timers(pool):
+    for kind, payload in timers.advance():
+        if kind == "dialogue":
+            roll_dialogue(payload)
         else:
-            self._boid_age_sum = 0
-            self._boid_count_history.append(0)
-        if predators:
-            self._predator_age_sum = sum(p.age for p in predators)
-            self._predator_count_history.append(len(predators))
+            roll_event_spawn(pool, payload)
+
+def _least_squares(xs, ys):
+    n = len(xs)
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    if variance == 0:
+        return 0.0, mean_y
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+    return slope, mean_y - slope * mean_x
+
+class PopulationAnalytics:
+    # Everything here is updated in O(1) per spawn, birth or death. Ages are derived from birth-tick
+    # histograms, densities are read from the tick's spatial grid, and vitals histograms are refreshed
+    # for a small rolling slice of each population per tick, so the analytics can stay on in long runs.
+    def __init__(self):
+        self.births = collections.Counter()
+        self.deaths = collections.Counter()
+        self.live = collections.Counter()
+        self.birth_tick_sums = collections.Counter()
+        self.birth_histograms = collections.defaultdict(collections.Counter)
+        self.vitals_histograms = collections.defaultdict(lambda: [[0] * ANALYTICS_VITALS_BINS for _ in range(3)])
+        self.population_samples = collections.deque(maxlen=ANALYTICS_WINDOW)
+        self.grid = None
+        self._refresh_cursors = collections.Counter()
+
+    def on_spawn(self, entity):
+        species = entity.species
+        entity.birth_tick = frame_count - entity.age
+        self.live[species] += 1
+        self.birth_tick_sums[species] += entity.birth_tick
+        self.birth_histograms[species][int(entity.birth_tick // ANALYTICS_AGE_BIN)] += 1
+
+    def on_birth(self, entity):
+        self.births[entity.species] += 1
+
+    def on_death(self, entity):
+        species = entity.species
+        self.deaths[(species, entity.death_cause)] += 1
+        self.live[species] -= 1
+        self.birth_tick_sums[species] -= entity.birth_tick
+        histogram = self.birth_histograms[species]
+        birth_bin = int(entity.birth_tick // ANALYTICS_AGE_BIN)
+        histogram[birth_bin] -= 1
+        if not histogram[birth_bin]:
+            # Bins of long-gone cohorts would otherwise pile up for the length of the run.
+            del histogram[birth_bin]
+        if entity.vitals_bins is not None:
+            histograms = self.vitals_histograms[species]
+            for vital, bin_index in enumerate(entity.vitals_bins):
+                histograms[vital][bin_index] -= 1
+            entity.vitals_bins = None
+
+    def on_tick(self, pool, grid):
+        self.grid = grid
+        for kind in (Boid, Predator):
+            members = pool.members[kind]
+            if not members:
+                continue
+            batch = max(1, math.ceil(len(members) / ANALYTICS_VITALS_REFRESH_TICKS))
+            cursor = self._refresh_cursors[kind]
+            for offset in range(min(batch, len(members))):
+                self._bin_vitals(members[(cursor + offset) % len(members)])
+            self._refresh_cursors[kind] = (cursor + batch) % len(members)
+        if int(frame_count) % ANALYTICS_SAMPLE_INTERVAL == 0:
+            self.population_samples.append((frame_count, self.live["boid"], self.live["predator"]))
+
+    def _bin_vitals(self, entity):
+        histograms = self.vitals_histograms[entity.species]
+        last_bin = ANALYTICS_VITALS_BINS - 1
+        bins = (min(last_bin, max(0, int(entity.energy / entity.max_energy * ANALYTICS_VITALS_BINS))),
+                min(last_bin, max(0, int(entity.health / entity.max_health * ANALYTICS_VITALS_BINS))),
+                min(last_bin, max(0, int(entity.thirst / entity.max_thirst * ANALYTICS_VITALS_BINS))))
+        if entity.vitals_bins is not None:
+            for vital, bin_index in enumerate(entity.vitals_bins):
+                histograms[vital][bin_index] -= 1
+        for vital, bin_index in enumerate(bins):
+            histograms[vital][bin_index] += 1
+        entity.vitals_bins = bins
+
+    def total_deaths(self, species):
+        return sum(count for (dead_species, _), count in self.deaths.items() if dead_species == species)
+
+    def deaths_by_cause(self, species):
+        return {cause: count for (dead_species, cause), count in self.deaths.items() if dead_species == species}
+
+    def average_age(self, species):
+        if self.live[species] <= 0:
+            return 0
+        return frame_count - self.birth_tick_sums[species] / self.live[species]
+
+    def age_histogram(self, species):
+        current_bin = int(frame_count // ANALYTICS_AGE_BIN)
+        histogram = collections.Counter()
+        for birth_bin, count in self.birth_histograms[species].items():
+            if count:
+                histogram[(current_bin - birth_bin) * ANALYTICS_AGE_BIN] += count
+        return dict(sorted(histogram.items()))
+
+    def vitals_histogram(self, species):
+        energy, health, thirst = self.vitals_histograms[species]
+        return {"energy": list(energy), "health": list(health), "thirst": list(thirst)}
+
+    def density_grid(self, species):
+        if self.grid is None:
+            return {}
+        return {cell: len(bucket) for cell, bucket in self.grid.cells(species).items()}
+
+    def fit_lotka_volterra(self):
+        # Prey x and predators y: d(ln x)/dt = a - b*y and d(ln y)/dt = c*x - d, each fitted by
+        # ordinary least squares over the sliding window of population samples.
+        samples = [sample for sample in self.population_samples if sample[1] > 0 and sample[2] > 0]
+        rows = []
+        for (t0, x0, y0), (t1, x1, y1) in zip(samples, samples[1:]):
+            if t1 > t0:
+                rows.append(((x0 + x1) / 2, (y0 + y1) / 2,
+                             (math.log(x1) - math.log(x0)) / (t1 - t0), (math.log(y1) - math.log(y0)) / (t1 - t0)))
+        if len(rows) < 2:
+            return None
+        slope_prey, intercept_prey = _least_squares([row[1] for row in rows], [row[2] for row in rows])
+        slope_predator, intercept_predator = _least_squares([row[0] for row in rows], [row[3] for row in rows])
+        a, b, c, d = intercept_prey, -slope_prey, slope_predator, -intercept_predator
+        return {
+            "prey_growth": a, "predation_rate": b, "predator_efficiency": c, "predator_death_rate": d,
+            "period": 2 * math.pi / math.sqrt(a * d) if a > 0 and d > 0 else None,
+            "equilibrium": {"prey": d / c if c > 0 else None, "predators": a / b if b > 0 else None},
+            "samples": len(rows) + 1,
+        }
+
+    def report(self):
+        return {
+            "frame": int(frame_count),
+            "population": {species: count for species, count in self.live.items()},
+            "births": dict(self.births),
+            "deaths": {species: self.deaths_by_cause(species) for species in ("boid", "predator")},
+            "average_age": {species: round(self.average_age(species), 1) for species in ("boid", "predator")},
+            "age_histogram": {species: self.age_histogram(species) for species in ("boid", "predator")},
+            "vitals_histogram": {species: self.vitals_histogram(species) for species in ("boid", "predator")},
+            "density": {species: [[cell[0], cell[1], count] for cell, count in self.density_grid(species).items()]
+                        for species in ("boid", "predator")},
+            "lotka_volterra": self.fit_lotka_volterra(),
+        }
+
+class MetricsPublisher:
+    def __init__(self, queue_size=METRICS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.subscribers = []
+        self.latest = {}
+        self.dropped = 0
+        self.server = None
+        self.speed_control = None
+        self.analytics = None
+        self._snapshot_waiters = []
+
+    async def start(self, host=METRICS_HOST, port=METRICS_PORT):
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        print(f"Live metrics on http://{host}:{port}/metrics (stream: /stream, positions: /snapshot)")
+
+    async def stop(self):
+        for waiter in self._snapshot_waiters:
+            if not waiter.done():
+                waiter.cancel()
+        self._snapshot_waiters = []
+        server, self.server = self.server, None
+        for _, wakeup in self.subscribers:
+            wakeup.set()
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+    def subscribe(self):
+        subscriber = (collections.deque(maxlen=self.queue_size), asyncio.Event())
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+
+    def publish(self, metrics):
+        # Never blocks the tick: each subscriber queue is bounded and drops its oldest entry.
+        self.latest = metrics
+        if not self.subscribers:
+            return
+        payload = json.dumps(metrics).encode()
+        for backlog, wakeup in self.subscribers:
+            if len(backlog) == backlog.maxlen:
+                self.dropped += 1
+            backlog.append(payload)
+            wakeup.set()
+
+    def wants_snapshot(self):
+        return bool(self._snapshot_waiters)
+
+    def request_snapshot(self):
+        waiter = asyncio.get_running_loop().create_future()
+        self._snapshot_waiters.append(waiter)
+        return waiter
+
+    def fulfill_snapshot(self, snapshot):
+        for waiter in self._snapshot_waiters:
+            if not waiter.done():
+                waiter.set_result(snapshot)
+        self._snapshot_waiters = []
+
+    async def handle_client(self, reader, writer):
+        subscriber = None
+        try:
+            request_line = await reader.readline()
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+            parts = request_line.decode("latin-1").split()
+            path, _, query = (parts[1] if len(parts) > 1 else "/").partition("?")
+            if path == "/metrics":
+                self._write_response(writer, "200 OK", json.dumps(self.latest).encode())
+            elif path == "/snapshot":
+                try:
+                    snapshot = await asyncio.wait_for(self.request_snapshot(), METRICS_SNAPSHOT_TIMEOUT)
+                except asyncio.TimeoutError:
+                    self._write_response(writer, "503 Service Unavailable", b'{"error": "snapshot timed out"}')
+                else:
+                    self._write_response(writer, "200 OK", json.dumps(snapshot).encode())
+            elif path == "/speed" and self.speed_control is not None:
+                try:
+                    for key, _, value in (pair.partition("=") for pair in query.split("&")):
+                        if key == "set":
+                            speed = float(value)
+                            if not math.isfinite(speed):
+                                raise ValueError(value)
+                            self.speed_control.set_speed(speed)
+                except ValueError:
+                    self._write_response(writer, "400 Bad Request", b'{"error": "set must be a number"}')
+                else:
+                    body = {"speed": self.speed_control.speed, "ticks_per_second": round(self.speed_control.ticks_per_second, 1)}
+                    self._write_response(writer, "200 OK", json.dumps(body).encode())
+            elif path == "/analytics" and self.analytics is not None:
+                self._write_response(writer, "200 OK", json.dumps(self.analytics.report()).encode())
+            elif path == "/stream":
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                             b"Cache-Control: no-cache\r\nAccess-Control-Allow-Origin: *\r\n\r\n")
+                subscriber = self.subscribe()
+                backlog, wakeup = subscriber
+                while self.server is not None:
+                    await wakeup.wait()
+                    wakeup.clear()
+                    while backlog:
+                        writer.write(b"data: " + backlog.popleft() + b"\n\n")
+                    await writer.drain()
+            else:
+                self._write_response(writer, "404 Not Found", b'{"error": "not found"}')
+            await writer.drain()
+        except (ConnectionError, asyncio.TimeoutError, asyncio.CancelledError, ValueError):
+            pass
+        finally:
+            if subscriber is not None:
+                self.unsubscribe(subscriber)
+            writer.close()
+
+    def _write_response(self, writer, status, body):
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                     f"Access-Control-Allow-Origin: *\r\nContent-Length: {len(body)}\r\n"
+                     f"Connection: close\r\n\r\n".encode() + body)
+
+def record_phase(phase_times, phase, phase_start):
+    now = time.perf_counter()
+    phase_times[phase] = now - phase_start
+    return now
+
+def agent_phase_time(phase_times):
+    return sum(phase_times.get(phase, 0.0) for phase in AGENT_PHASES)
+
+def build_metrics(frame_count, tick_rate, phase_times, boids, predators, food_items, stats, steering=None):
+    metrics = {
+        "frame": int(frame_count),
+        "tick_rate": round(tick_rate, 2),
+        "population": {"boids": len(boids), "predators": len(predators), "food": len(food_items)},
+        "births": {"boid": stats.births["boid"], "predator": stats.births["predator"]},
+        "deaths": {"boid": stats.deaths_by_cause("boid"), "predator": stats.deaths_by_cause("predator")},
+        "event": current_event,
+        "event_time_left": max(0, int(event_timer_countdown)) if current_event else 0,
+        "phase_ms": {phase: round(seconds * 1000, 3) for phase, seconds in phase_times.items()},
+    }
+    if STEERING_SLICING_ENABLED and steering is not None:
+        metrics["steering"] = steering.summary()
+    return metrics
+
+def build_entity_snapshot(frame_count, boids, predators, food_items, water_sources, obstacles):
+    return {
+        "frame": int(frame_count),
+        "boids": [(round(b.position.x, 1), round(b.position.y, 1)) for b in boids if b.is_alive],
+        "predators": [(round(p.position.x, 1), round(p.position.y, 1)) for p in predators if p.is_alive],
+        "food": [(round(f.position.x, 1), round(f.position.y, 1)) for f in food_items if f.is_alive],
+        "water": [(round(w.position.x, 1), round(w.position.y, 1), round(w.water_level, 1)) for w in water_sources],
+        "obstacles": [(round(o.position.x, 1), round(o.position.y, 1)) for o in obstacles],
+    }
+
+def background_fill(event_color):
+    return tuple(c * (event_color[c] / 255) for c in range(3))
+
+class BackgroundCache:
+    # Obstacles, water outlines and the event tint are prerendered into a base surface that is only
+    # rebuilt when the camera, tint or set of static entities changes. Water fills live on a composite
+    # copy and are repainted locally, only when a source's drawn fill radius changes.
+    def __init__(self):
+        self.base = None
+        self.composite = None
+        self.key = None
+        self.fill_radii = {}
+        self.rebuilds = 0
+
+    def draw(self, screen, font, camera, event_color, water_sources, obstacles):
+        key = (camera.position.x, camera.position.y, camera.zoom, event_color,
+               tuple(obstacle.entity_id for obstacle in obstacles), tuple(water.entity_id for water in water_sources))
+        if key != self.key or self.base is None or self.base.get_size() != screen.get_size():
+            self._rebuild(screen, font, camera, event_color, water_sources, obstacles)
+            self.key = key
         else:
-            self._predator_age_sum = 0
-            self._predator_count_history.append(0)
-
-    def get_average_age(self, entity_type):
-        if entity_type == 'boid' and self._boid_count_history and self._boid_age_sum > 0:
-            return self._boid_age_sum / self._boid_count_history[-1] if self._boid_count_history[-1] > 0 else 0
-        elif entity_type == 'predator' and self._predator_count_history and self._predator_age_sum > 0:
-            return self._predator_age_sum / self._predator_count_history[-1] if self._predator_count_history[-1] > 0 else 0
+            for water in water_sources:
+                if water.fill_radius(camera) != self.fill_radii.get(water.entity_id):
+                    self._repaint_water(water, camera, water_sources)
+        screen.blit(self.composite, (0, 0))
+
+    def _rebuild(self, screen, font, camera, event_color, water_sources, obstacles):
+        if self.base is None or self.base.get_size() != screen.get_size():
+            self.base = pygame.Surface(screen.get_size())
+            self.composite = pygame.Surface(screen.get_size())
+        self.base.fill(background_fill(event_color))
+        for obstacle in obstacles:
+            obstacle.draw(self.base, font, camera)
+        for water in water_sources:
+            water.draw_outline(self.base, camera)
+        self.composite.blit(self.base, (0, 0))
+        for water in water_sources:
+            water.draw_fill(self.composite, camera)
+        self.fill_radii = {water.entity_id: water.fill_radius(camera) for water in water_sources}
+        self.rebuilds += 1
+
+    def _repaint_water(self, water, camera, water_sources):
+        pos = camera.apply(water.position)
+        reach = math.ceil(water.size * camera.zoom) + 2
+        area = pygame.Rect(int(pos.x) - reach, int(pos.y) - reach, reach * 2, reach * 2).clip(self.composite.get_rect())
+        self.composite.blit(self.base, area, area)
+        self.composite.set_clip(area)
+        for other in water_sources:
+            other.draw_fill(self.composite, camera)
+        self.composite.set_clip(None)
+        self.fill_radii[water.entity_id] = water.fill_radius(camera)
+
+def draw_world(screen, font, camera, event_color, boids, predators, food_items, water_sources, obstacles, particles, background=None):
+    if background is not None:
+        background.draw(screen, font, camera, event_color, water_sources, obstacles)
+    else:
+        screen.fill(background_fill(event_color))
+        for obstacle in obstacles:
+            obstacle.draw(screen, font, camera)
+        for water in water_sources:
+            water.draw(screen, font, camera)
+    for food in food_items:
+        food.draw(screen, font, camera)
+    for predator in predators:
+        predator.draw(screen, font, camera)
+    for boid in boids:
+        boid.draw(screen, font, camera)
+    for particle in particles:
+        particle.draw(screen, camera)
+
+def draw_hud(screen, font, story_font, world, header, footer=None):
+    stats = world.stats
+    lines = [
+        header,
+        f"Boids: {len(world.boids)} (Born: {stats.births['boid']} | Dead: {stats.total_deaths('boid')}) AvgAge: {stats.average_age('boid'):.1f}",
+        f"Predators: {len(world.predators)} (Born: {stats.births['predator']} | Dead: {stats.total_deaths('predator')}) AvgAge: {stats.average_age('predator'):.1f}",
+        f"Food: {len(world.food_items)} | Water: {len(world.water_sources)} | Obstacles: {len(world.obstacles)}",
+        f"Particles: {len(world.particles)}",
+    ]
+    if footer:
+        lines.append(footer)
+    for i, line in enumerate(lines):
+        stats_surface = font.render(line, True, (180, 180, 180))
+        screen.blit(stats_surface, (10, 10 + i * 20))
+    if current_event:
+        event_text = f"Event: {current_event.replace('_', ' ').title()} ({int(event_timer_countdown / (1/SIM_SPEED))}s left)"
+        event_surface = font.render(event_text, True, (255, 220, 0))
+        screen.blit(event_surface, (WIDTH - event_surface.get_width() - 10, 10))
+    if story_timer > 0:
+        story_surface = story_font.render(story_message, True, (255, 255, 200))
+        story_rect = story_surface.get_rect(center=(WIDTH / 2, HEIGHT - 50))
+        screen.blit(story_surface, story_rect)
+
+def _write_png(path, width, height, rgb):
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+    stride = width * 3
+    raw = b"".join(b"\x00" + rgb[row * stride:(row + 1) * stride] for row in range(height))
+    with open(path, "wb") as png_file:
+        png_file.write(b"\x89PNG\r\n\x1a\n")
+        png_file.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        png_file.write(chunk(b"IDAT", zlib.compress(raw, EXPORT_PNG_COMPRESSION)))
+        png_file.write(chunk(b"IEND", b""))
+
+class FrameExporter:
+    # The simulation thread only copies the surface into bytes and offers it to a bounded queue;
+    # PNG encoding or the pipe write happens on a background thread. A full queue is waited on for at
+    # most EXPORT_WAIT_MS, then the frame is dropped and counted instead of stalling the tick.
+    def __init__(self, directory=None, encoder_command=None, queue_size=EXPORT_QUEUE_SIZE):
+        self.directory = directory
+        self.process = None
+        if encoder_command:
+            command = shlex.split(encoder_command.format(width=WIDTH, height=HEIGHT, fps=FPS))
+            try:
+                if not command or shutil.which(command[0]) is None:
+                    raise FileNotFoundError(f"encoder {command[0] if command else encoder_command!r} not found")
+                self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+            except OSError as error:
+                self.directory = directory or EXPORT_FALLBACK_DIRECTORY
+                print(f"Cannot start the encoder ({error}); writing PNG frames to {self.directory} instead")
+        if self.process is None and self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.frames_queued = 0
+        self.frames_written = 0
+        self.dropped = 0
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name="frame-exporter", daemon=True)
+        self.thread.start()
+
+    def capture(self, surface):
+        if self.error is not None:
+            return
+        to_bytes = getattr(pygame.image, "tobytes", None) or pygame.image.tostring
+        try:
+            self.queue.put((self.frames_queued, surface.get_size(), to_bytes(surface, "RGB")), timeout=EXPORT_WAIT_MS / 1000)
+        except queue.Full:
+            if not self.dropped:
+                print("Frame export is falling behind; dropping frames (the count is reported at the end)")
+            self.dropped += 1
+            return
+        self.frames_queued += 1
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            index, (width, height), data = item
+            try:
+                if self.process is not None:
+                    self.process.stdin.write(data)
+                else:
+                    _write_png(os.path.join(self.directory, f"frame_{index:06d}.png"), width, height, data)
+                self.frames_written += 1
+            except OSError as error:
+                self.error = error
+                print(f"Frame export stopped: {error}")
+                return
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+            self.process.wait()
+        print(f"Exported {self.frames_written} frames ({self.dropped} dropped)")
+
+# --- Replay Format ---
+# Header: magic, u32 length, JSON metadata. Then zlib chunks of REPLAY_KEYFRAME_INTERVAL ticks, each
+# prefixed by u32 byte length, u32 first tick, u32 tick count. Every chunk starts from an empty reference
+# state, so its first tick is a keyframe and any chunk can be decoded on its own. A tick record holds
+# spawns (id, kind), despawns (id, cause), the active event and, for each entity whose quantized state
+# changed, its id gap, a field mask and zigzag varint deltas.
+REPLAY_MAGIC = b"ECOREPLAY"
+REPLAY_VERSION = 1
+REPLAY_KINDS = ["boid", "predator", "food", "water", "obstacle"]
+REPLAY_CAUSES = ["unknown", "energy", "health", "thirst", "age", "predator", "eaten", "decayed"]
+REPLAY_FIELDS = 7  # x, y, heading, energy, health, thirst, flags
+REPLAY_FLAG_SICK = 1
+_CHUNK_HEADER = struct.Struct("<III")
+
+def _write_varint(buffer, value):
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+def _zigzag(value):
+    return (value << 1) if value >= 0 else ((-value << 1) - 1)
+
+def _unzigzag(value):
+    return (value >> 1) if not value & 1 else -((value + 1) >> 1)
+
+def _quantize_fraction(value, maximum):
+    if maximum <= 0:
         return 0
+    return max(0, min(255, int(value / maximum * 255 + 0.5)))
 
-async def run_simulation():
-    global event_timer, current_event, event_duration, event_timer_countdown, frame_count, story_index, story_message, story_timer
+def quantize_entity(entity):
+    position_x = int(round(entity.position.x * REPLAY_POSITION_SCALE))
+    position_y = int(round(entity.position.y * REPLAY_POSITION_SCALE))
+    if isinstance(entity, WaterSource):
+        return (position_x, position_y, 0, _quantize_fraction(entity.water_level, WATER_MAX_LEVEL), 0, 0, 0)
+    if isinstance(entity, (Food, Obstacle)):
+        return (position_x, position_y, 0, 0, 0, 0, 0)
+    heading = int(round(math.atan2(entity.velocity.y, entity.velocity.x) / (2 * math.pi) * 256)) & 0xFF
+    return (position_x, position_y, heading,
+            _quantize_fraction(entity.energy, entity.max_energy),
+            _quantize_fraction(entity.health, entity.max_health),
+            _quantize_fraction(entity.thirst, entity.max_thirst),
+            REPLAY_FLAG_SICK if entity.is_sick else 0)
+
+class ReplayRecorder:
+    def __init__(self, path, keyframe_interval=REPLAY_KEYFRAME_INTERVAL):
+        self.file = open(path, "wb")
+        self.keyframe_interval = keyframe_interval
+        self.tick = 0
+        self.chunk = bytearray()
+        self.chunk_first_tick = 0
+        self.chunk_ticks = 0
+        self.tracked = {}
+        self.states = {}
+        header = json.dumps({
+            "version": REPLAY_VERSION, "width": WIDTH, "height": HEIGHT, "fps": FPS,
+            "keyframe_interval": keyframe_interval, "position_scale": REPLAY_POSITION_SCALE,
+            "kinds": REPLAY_KINDS, "causes": REPLAY_CAUSES, "events": EVENT_TYPES,
+        }).encode()
+        self.file.write(REPLAY_MAGIC + struct.pack("<I", len(header)) + header)
+
+    def record_tick(self, boids, predators, food_items, water_sources, obstacles):
+        keyframe = self.chunk_ticks == 0
+        if keyframe:
+            self.states = {}
+        current = {}
+        for kind, entities in enumerate((boids, predators, food_items, water_sources, obstacles)):
+            for entity in entities:
+                if entity.is_alive:
+                    current[entity.entity_id] = (kind, entity)
+        buffer = self.chunk
+        buffer.append(1 if keyframe else 0)
+        spawned = [entity_id for entity_id in current if entity_id not in self.tracked or keyframe]
+        _write_varint(buffer, len(spawned))
+        for entity_id in spawned:
+            _write_varint(buffer, entity_id)
+            buffer.append(current[entity_id][0])
+        despawned = [entity_id for entity_id in self.tracked if entity_id not in current]
+        _write_varint(buffer, len(despawned))
+        for entity_id in despawned:
+            _write_varint(buffer, entity_id)
+            cause = self.tracked[entity_id][1].death_cause
+            buffer.append(REPLAY_CAUSES.index(cause) if cause in REPLAY_CAUSES else 0)
+            self.states.pop(entity_id, None)
+        buffer.append(EVENT_TYPES.index(current_event) + 1 if current_event else 0)
+        updates = []
+        for entity_id in sorted(current):
+            state = quantize_entity(current[entity_id][1])
+            previous = self.states.get(entity_id)
+            if previous != state:
+                updates.append((entity_id, state, previous or (0,) * REPLAY_FIELDS))
+                self.states[entity_id] = state
+        _write_varint(buffer, len(updates))
+        last_id = 0
+        for entity_id, state, previous in updates:
+            _write_varint(buffer, entity_id - last_id)
+            last_id = entity_id
+            mask = 0
+            for field in range(REPLAY_FIELDS):
+                if state[field] != previous[field]:
+                    mask |= 1 << field
+            buffer.append(mask)
+            for field in range(REPLAY_FIELDS):
+                if mask & (1 << field):
+                    _write_varint(buffer, _zigzag(state[field] - previous[field]))
+        self.tracked = current
+        self.tick += 1
+        self.chunk_ticks += 1
+        if self.chunk_ticks >= self.keyframe_interval:
+            self.flush()
+
+    def flush(self):
+        if self.chunk_ticks == 0:
+            return
+        data = zlib.compress(bytes(self.chunk), 6)
+        self.file.write(_CHUNK_HEADER.pack(len(data), self.chunk_first_tick, self.chunk_ticks) + data)
+        self.file.flush()
+        self.chunk = bytearray()
+        self.chunk_first_tick = self.tick
+        self.chunk_ticks = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+class ReplayReader:
+    def __init__(self, path):
+        with open(path, "rb") as replay_file:
+            data = replay_file.read()
+        if not data.startswith(REPLAY_MAGIC):
+            raise ValueError(f"{path} is not an Ecosystem Reborn replay")
+        pos = len(REPLAY_MAGIC)
+        (header_length,) = struct.unpack_from("<I", data, pos)
+        pos += 4
+        self.header = json.loads(data[pos:pos + header_length])
+        pos += header_length
+        self.data = data
+        self.chunks = []
+        while pos + _CHUNK_HEADER.size <= len(data):
+            length, first_tick, tick_count = _CHUNK_HEADER.unpack_from(data, pos)
+            pos += _CHUNK_HEADER.size
+            if pos + length > len(data):
+                break
+            self.chunks.append((pos, length, first_tick, tick_count))
+            pos += length
+        self.chunk_starts = [chunk[2] for chunk in self.chunks]
+        self.total_ticks = self.chunks[-1][2] + self.chunks[-1][3] if self.chunks else 0
+        self.tick = -1
+        self.states = {}
+        self.kinds = {}
+        self.event = None
+        self.births = []
+        self.deaths = []
+        self._chunk_index = -1
+        self._chunk_data = b""
+        self._chunk_pos = 0
+
+    def _load_chunk(self, index):
+        offset, length, first_tick, _ = self.chunks[index]
+        self._chunk_index = index
+        self._chunk_data = zlib.decompress(self.data[offset:offset + length])
+        self._chunk_pos = 0
+        self.tick = first_tick - 1
+
+    def seek(self, tick):
+        tick = max(0, min(tick, self.total_ticks - 1))
+        index = bisect.bisect_right(self.chunk_starts, tick) - 1
+        if index != self._chunk_index or tick < self.tick:
+            self._load_chunk(index)
+        while self.tick < tick:
+            self._decode_tick()
+        return self.tick
+
+    def _decode_tick(self):
+        if self._chunk_pos >= len(self._chunk_data):
+            self._load_chunk(self._chunk_index + 1)
+        data = self._chunk_data
+        pos = self._chunk_pos
+        keyframe = data[pos]
+        pos += 1
+        if keyframe:
+            # Despawns follow the keyframe's spawn list, and the entities they name are not in it, so
+            # their kinds are still looked up in the map being replaced.
+            previous_ids = set(self.states)
+            previous_kinds = self.kinds
+            self.states = {}
+            self.kinds = {}
+        self.births = []
+        self.deaths = []
+        spawn_count, pos = _read_varint(data, pos)
+        for _ in range(spawn_count):
+            entity_id, pos = _read_varint(data, pos)
+            self.kinds[entity_id] = REPLAY_KINDS[data[pos]]
+            self.states[entity_id] = (0,) * REPLAY_FIELDS
+            pos += 1
+            if not keyframe or entity_id not in previous_ids:
+                self.births.append(entity_id)
+        despawn_count, pos = _read_varint(data, pos)
+        for _ in range(despawn_count):
+            entity_id, pos = _read_varint(data, pos)
+            kind = self.kinds.pop(entity_id, None)
+            if kind is None and keyframe:
+                kind = previous_kinds.get(entity_id)
+            self.deaths.append((entity_id, kind, REPLAY_CAUSES[data[pos]]))
+            self.states.pop(entity_id, None)
+            pos += 1
+        event_index = data[pos]
+        pos += 1
+        self.event = EVENT_TYPES[event_index - 1] if event_index else None
+        update_count, pos = _read_varint(data, pos)
+        entity_id = 0
+        for _ in range(update_count):
+            gap, pos = _read_varint(data, pos)
+            entity_id += gap
+            mask = data[pos]
+            pos += 1
+            state = list(self.states[entity_id])
+            for field in range(REPLAY_FIELDS):
+                if mask & (1 << field):
+                    delta, pos = _read_varint(data, pos)
+                    state[field] += _unzigzag(delta)
+            self.states[entity_id] = tuple(state)
+        self._chunk_pos = pos
+        self.tick += 1
+
+REPLAY_KIND_CLASSES = {"boid": Boid, "predator": Predator, "food": Food, "water": WaterSource, "obstacle": Obstacle}
+
+def apply_replay_state(entity, state):
+    scale = REPLAY_POSITION_SCALE
+    entity.position.update(state[0] / scale, state[1] / scale)
+    if isinstance(entity, WaterSource):
+        entity.water_level = state[3] / 255 * WATER_MAX_LEVEL
+    elif isinstance(entity, (Boid, Predator)):
+        entity.velocity.from_polar((1, state[2] / 256 * 360))
+        entity.energy = state[3] / 255 * entity.max_energy
+        entity.health = state[4] / 255 * entity.max_health
+        entity.thirst = state[5] / 255 * entity.max_thirst
+        entity.is_sick = bool(state[6] & REPLAY_FLAG_SICK)
+
+async def run_replay_viewer(path):
+    reader = ReplayReader(path)
+    if not reader.total_ticks:
+        print(f"{path} contains no recorded ticks")
+        return
     pygame.init()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("Ecosystem Reborn: A Struggle for Survival")
+    pygame.display.set_caption(f"Ecosystem Reborn Replay: {path}")
     try:
         font = pygame.font.SysFont("Arial", 14)
-        story_font = pygame.font.SysFont("Arial", 20)
     except pygame.error:
         font = pygame.font.Font(None, 14)
-        story_font = pygame.font.Font(None, 20)
     clock = pygame.time.Clock()
-    frame_count = 0
-    boids = [Boid(random.uniform(0, WIDTH), random.uniform(0, HEIGHT)) for _ in range(NUM_BOIDS)]
-    predators = [Predator(random.uniform(0, WIDTH), random.uniform(0, HEIGHT)) for _ in range(NUM_PREDATORS)]
-    food_items = [Food(random.uniform(0, WIDTH), random.uniform(0, HEIGHT)) for _ in range(NUM_FOOD)]
-    water_sources = [WaterSource(random.uniform(0, WIDTH), random.uniform(0, HEIGHT)) for _ in range(NUM_WATER_SOURCES)]
-    obstacles = [Obstacle(random.uniform(0, WIDTH), random.uniform(0, HEIGHT)) for _ in range(NUM_OBSTACLES)]
-    particles = []
-    food_spawn_timer = FOOD_SPAWN_INTERVAL
-    stats = SimulationStats()
     camera = Camera()
-    running = True
+    proxies = {}
+    background = BackgroundCache()
+    playback_speed = 1.0
+    position = 0.0
     paused = False
+    running = True
+    reader.seek(0)
     while running:
         events = pygame.event.get()
         for event in events:
             if event.type == pygame.QUIT:
                 running = False
-            if event.type == pygame.KEYDOWN:
+            elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     running = False
                 elif event.key == pygame.K_SPACE:
@@ -1021,129 +3101,1008 @@ async def run_simulation():
                 elif event.key == pygame.K_r:
                     camera.position = Vector2(WIDTH / 2, HEIGHT / 2)
                     camera.zoom = 1.0
-        if paused:
-            await asyncio.sleep(1.0 / FPS)
-            continue
+                elif event.key == pygame.K_UP:
+                    playback_speed = min(REPLAY_MAX_SPEED, playback_speed * 2)
+                elif event.key == pygame.K_DOWN:
+                    playback_speed = max(1 / REPLAY_MAX_SPEED, playback_speed / 2)
+                elif event.key == pygame.K_RIGHT:
+                    position = min(reader.total_ticks - 1, position + REPLAY_SEEK_STEP)
+                elif event.key == pygame.K_LEFT:
+                    position = max(0, position - REPLAY_SEEK_STEP)
+                elif event.key == pygame.K_HOME:
+                    position = 0
         camera.update(events)
-        grid = {}
-        all_entities_list = boids + predators + food_items + water_sources + obstacles
-        for entity in all_entities_list:
-            if entity.is_alive or isinstance(entity, (Food, WaterSource, Obstacle)):
-                cell = get_grid_cell(entity.position)
-                if cell not in grid:
-                    grid[cell] = []
-                grid[cell].append(entity)
-        new_boids = []
-        new_predators = []
-        dead_entities = []
-        for boid in boids:
-            result = boid.update(all_entities_list, grid, particles)
-            if result is None:
-                dead_entities.append(boid)
-            elif isinstance(result, Boid):
-                new_boids.append(result)
-        for predator in predators:
-            result = predator.update(all_entities_list, grid, particles)
-            if result is None:
-                dead_entities.append(predator)
-            elif isinstance(result, Predator):
-                new_predators.append(result)
-        for item in food_items + water_sources + obstacles:
-            result = item.update(all_entities_list, grid, particles)
-            if result is None and item.is_alive is False:
-                dead_entities.append(item)
-        stats.boid_births += len(new_boids)
-        boids.extend(new_boids)
-        stats.predator_births += len(new_predators)
-        predators.extend(new_predators)
-        for entity in dead_entities:
-            if isinstance(entity, Boid):
-                if entity.energy <= 0 and entity.age < entity.max_age * 0.9:
-                    stats.boid_deaths_energy += 1
-                elif entity.health <= 0 and entity.age < entity.max_age * 0.9:
-                    stats.boid_deaths_health += 1
-                elif entity.thirst <= 0 and entity.age < entity.max_age * 0.9:
-                    stats.boid_deaths_thirst += 1
-                elif entity.age >= entity.max_age * 0.9:
-                    stats.boid_deaths_age += 1
+        if not paused:
+            position = min(reader.total_ticks - 1, position + playback_speed)
+        reader.seek(int(position))
+        for entity_id in [entity_id for entity_id in proxies if entity_id not in reader.states]:
+            del proxies[entity_id]
+        groups = {kind: [] for kind in REPLAY_KINDS}
+        for entity_id, state in reader.states.items():
+            kind = reader.kinds[entity_id]
+            entity = proxies.get(entity_id)
+            if entity is None:
+                entity = REPLAY_KIND_CLASSES[kind](state[0] / REPLAY_POSITION_SCALE, state[1] / REPLAY_POSITION_SCALE)
+                proxies[entity_id] = entity
+            apply_replay_state(entity, state)
+            groups[kind].append(entity)
+        event_color = EVENT_TINTS.get(reader.event, (255, 255, 255))
+        draw_world(screen, font, camera, event_color, groups["boid"], groups["predator"], groups["food"],
+                   groups["water"], groups["obstacle"], [], background)
+        lines = [
+            f"Replay tick: {reader.tick} / {reader.total_ticks - 1}  Speed: {playback_speed:g}x{'  (paused)' if paused else ''}",
+            f"Boids: {len(groups['boid'])} | Predators: {len(groups['predator'])} | Food: {len(groups['food'])} | Obstacles: {len(groups['obstacle'])}",
+            "Controls: Space pause, Up/Down speed, Left/Right seek, Home restart, Drag to pan, Scroll to zoom"
+        ]
+        for i, line in enumerate(lines):
+            screen.blit(font.render(line, True, (180, 180, 180)), (10, 10 + i * 20))
+        if reader.event:
+            event_surface = font.render(f"Event: {reader.event.replace('_', ' ').title()}", True, (255, 220, 0))
+            screen.blit(event_surface, (WIDTH - event_surface.get_width() - 10, 10))
+        pygame.display.flip()
+        clock.tick(FPS)
+        await asyncio.sleep(0)
+    pygame.quit()
+
+class EntityPool:
+    def __init__(self, observer=None):
+        self.observer = observer
+        self.slots = []
+        self.generations = []
+        self.free_slots = []
+        self.members = collections.defaultdict(list)
+        self.counts = collections.Counter()
+        self.pending_births = []
+        self.pending_deaths = []
+        self.vitals = VitalSchedule()
+        self.neighbor_lists = NeighborLists()
+        self.intents = IntentLedger()
+        self.packs = PackRegistry()
+        self.steering = SteeringScheduler()
+
+    def spawn(self, entity):
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.slots[slot] = entity
+        else:
+            slot = len(self.slots)
+            self.slots.append(entity)
+            self.generations.append(0)
+        kind = type(entity)
+        members = self.members[kind]
+        entity.pool = self
+        entity.handle = (slot, self.generations[slot])
+        entity.member_index = len(members)
+        members.append(entity)
+        self.counts[kind] += 1
+        if entity.lazy_vitals:
+            entity.refresh_vital_rates()
+        if self.observer is not None:
+            self.observer.on_spawn(entity)
+        return entity.handle
+
+    def spawn_many(self, entities):
+        # Same bookkeeping as spawn for a batch of one kind. Fresh entities mostly share their vitals, so
+        # the tick of their next vital event is worked out once per distinct set of vitals.
+        if not entities:
+            return
+        kind = type(entities[0])
+        members = self.members[kind]
+        slots, generations, free_slots = self.slots, self.generations, self.free_slots
+        due_ticks = {}
+        for entity in entities:
+            if free_slots:
+                slot = free_slots.pop()
+                slots[slot] = entity
+            else:
+                slot = len(slots)
+                slots.append(entity)
+                generations.append(0)
+            entity.pool = self
+            entity.handle = (slot, generations[slot])
+            entity.member_index = len(members)
+            members.append(entity)
+            if entity.lazy_vitals:
+                key = (entity._energy, entity._thirst, entity._health, entity._age, entity.is_sick,
+                       entity.reproduction_ready, entity.reproduction_tick())
+                shared = due_ticks.get(key) if entity.vitals_tick == frame_count else None
+                if shared is None:
+                    entity.refresh_vital_rates()
+                    due_ticks[key] = entity.vital_rates, frame_count + entity.ticks_to_vital_event() * SIM_SPEED
                 else:
-                    stats.boid_deaths_predator += 1
-            elif isinstance(entity, Predator):
-                if entity.energy <= 0 and entity.age < entity.max_age * 0.9:
-                    stats.predator_deaths_energy += 1
-                elif entity.health <= 0 and entity.age < entity.max_age * 0.9:
-                    stats.predator_deaths_health += 1
-                elif entity.thirst <= 0 and entity.age < entity.max_age * 0.9:
-                    stats.predator_deaths_thirst += 1
-                elif entity.age >= entity.max_age * 0.9:
-                    stats.predator_deaths_age += 1
-        boids = [boid for boid in boids if boid.is_alive]
-        predators = [predator for predator in predators if predator.is_alive]
-        food_items = [food for food in food_items if food.is_alive]
+                    entity.vital_rates = shared[0]
+                    self.vitals.schedule(entity, shared[1])
+            if self.observer is not None:
+                self.observer.on_spawn(entity)
+        self.counts[kind] += len(entities)
+
+    def queue_spawn(self, entity):
+        self.pending_births.append(entity)
+
+    def mark_dead(self, entity):
+        self.counts[type(entity)] -= 1
+        self.pending_deaths.append(entity)
+
+    def get(self, handle):
+        # A handle only resolves while its slot still holds the same generation, so references
+        # to dead entities go stale instead of pointing at whatever reused the slot.
+        if handle is None:
+            return None
+        slot, generation = handle
+        if self.generations[slot] != generation:
+            return None
+        return self.slots[slot]
+
+    def count(self, kind):
+        return self.counts[kind]
+
+    def commit(self):
+        dead = self.pending_deaths
+        self.pending_deaths = []
+        for entity in dead:
+            members = self.members[type(entity)]
+            last = members.pop()
+            if last is not entity:
+                members[entity.member_index] = last
+                last.member_index = entity.member_index
+            slot = entity.handle[0]
+            self.slots[slot] = None
+            self.generations[slot] += 1
+            self.free_slots.append(slot)
+            entity.member_index = -1
+            if self.observer is not None:
+                self.observer.on_death(entity)
+        births = self.pending_births
+        self.pending_births = []
+        for entity in births:
+            self.spawn(entity)
+        return dead, births
+
+class World:
+    def __init__(self):
+        global frame_count, timers
+        frame_count = 0
+        timers = TimerWheel()
+        self.stats = PopulationAnalytics()
+        self.pool = EntityPool(self.stats)
+        populations = [(Boid, NUM_BOIDS), (Predator, NUM_PREDATORS), (Food, NUM_FOOD),
+                       (WaterSource, NUM_WATER_SOURCES), (Obstacle, NUM_OBSTACLES)]
+        for kind, count in reversed(populations) if BULK_SPAWN_ENABLED else populations:
+            spawn_batch(self.pool, kind, count)
+        self.particles = []
+        self.food_spawn_timer = FOOD_SPAWN_INTERVAL
+        self.event_color = (255, 255, 255)
+        self.phase_times = {}
+        self.grid_tuner = GridTuner()
+
+    @property
+    def boids(self):
+        return self.pool.members[Boid]
+
+    @property
+    def predators(self):
+        return self.pool.members[Predator]
+
+    @property
+    def food_items(self):
+        return self.pool.members[Food]
+
+    @property
+    def water_sources(self):
+        return self.pool.members[WaterSource]
+
+    @property
+    def obstacles(self):
+        return self.pool.members[Obstacle]
+
+    def step(self):
+        global event_timer, frame_count, story_index, story_message, story_timer
+        phase_times = self.phase_times
+        stats = self.stats
+        pool = self.pool
+        particles = self.particles
+        phase_start = time.perf_counter()
+        grid = SpatialGrid(pool, self.grid_tuner)
+        if NEIGHBOR_LISTS_ENABLED:
+            pool.neighbor_lists.begin_tick(pool)
+        if STEERING_SLICING_ENABLED:
+            pool.steering.begin_tick()
+        phase_start = record_phase(phase_times, "grid", phase_start)
+        if PACK_COORDINATION_ENABLED:
+            pool.packs.refresh(self.predators, grid)
+            phase_start = record_phase(phase_times, "packs", phase_start)
+        if TWO_PHASE_TICK_ENABLED:
+            for boid in self.boids:
+                boid.sense(pool, grid, particles)
+            for predator in self.predators:
+                predator.sense(pool, grid, particles)
+            phase_start = record_phase(phase_times, "sense", phase_start)
+            pool.intents.resolve(particles)
+            phase_start = record_phase(phase_times, "commit", phase_start)
+        for boid in self.boids:
+            if TWO_PHASE_TICK_ENABLED and not boid.is_alive:
+                continue  # killed while claims were settled; devour has already burst its particles
+            new_boid = boid.update(pool, grid, particles)
+            if new_boid is not None:
+                pool.queue_spawn(new_boid)
+        phase_start = record_phase(phase_times, "boids", phase_start)
+        for predator in self.predators:
+            new_predator = predator.update(pool, grid, particles)
+            if new_predator is not None:
+                pool.queue_spawn(new_predator)
+        if TWO_PHASE_TICK_ENABLED:
+            pool.intents.resolve_contacts()
+        phase_start = record_phase(phase_times, "predators", phase_start)
+        for kind in (Food, WaterSource, Obstacle):
+            for item in pool.members[kind]:
+                item.update(pool, grid, particles)
+        phase_start = record_phase(phase_times, "items", phase_start)
+        for entity in pool.vitals.pop_due(frame_count):
+            entity.on_vital_event()
+        _, births = pool.commit()
+        for entity in births:
+            stats.on_birth(entity)
         for particle in particles:
             particle.update()
-        particles = [particle for particle in particles if particle.is_alive]
-        stats.update(boids, predators)
-        food_spawn_timer -= SIM_SPEED
-        if food_spawn_timer <= 0 and len(food_items) < FOOD_MAX_COUNT:
-            food_items.append(Food(random.uniform(0, WIDTH), random.uniform(0, HEIGHT)))
-            food_spawn_timer = FOOD_SPAWN_INTERVAL
+        self.particles = [particle for particle in particles if particle.is_alive]
+        if len(self.particles) > PARTICLE_MAX_COUNT:
+            del self.particles[:-PARTICLE_MAX_COUNT]
+        stats.on_tick(pool, grid)
+        phase_start = record_phase(phase_times, "bookkeeping", phase_start)
+        self.food_spawn_timer -= SIM_SPEED
+        if self.food_spawn_timer <= 0 and pool.count(Food) < FOOD_MAX_COUNT:
+            spawn_batch(pool, Food, 1)
+            self.food_spawn_timer = FOOD_SPAWN_INTERVAL
         if current_event is None:
             event_timer -= SIM_SPEED
             if event_timer <= 0:
-                trigger_random_event({"boids": boids, "predators": predators}, food_items, predators, obstacles, water_sources)
-        event_color = handle_active_event({"boids": boids, "predators": predators}, food_items, predators, obstacles, water_sources)
+                trigger_random_event(pool)
+        run_timers(pool)
+        self.event_color = handle_active_event(pool)
         story_timer -= SIM_SPEED
         if story_index < len(STORY_EVENTS) - 1 and frame_count >= STORY_EVENTS[story_index + 1][0]:
             story_index += 1
             story_message = STORY_EVENTS[story_index][1]
             story_timer = 300
-            for entity in random.sample(boids + predators, min(5, len(boids + predators))):
+            for entity in random.sample(self.boids + self.predators, min(5, len(self.boids + self.predators))):
                 if entity.dialogue_timer <= 0:
                     entity.start_dialogue(status="story")
-        screen.fill(tuple(c * (event_color[c] / 255) for c in range(3)))
-        for obstacle in obstacles:
-            obstacle.draw(screen, font, camera)
-        for water in water_sources:
-            water.draw(screen, font, camera)
-        for food in food_items:
-            food.draw(screen, font, camera)
-        for predator in predators:
-            predator.draw(screen, font, camera)
-        for boid in boids:
-            boid.draw(screen, font, camera)
-        for particle in particles:
-            particle.draw(screen, camera)
-        stats_lines = [
-            f"Frame: {int(frame_count)} FPS: {int(clock.get_fps())}",
-            f"Boids: {len(boids)} (Born: {stats.boid_births} | Dead: {stats.boid_deaths_energy+stats.boid_deaths_health+stats.boid_deaths_thirst+stats.boid_deaths_age+stats.boid_deaths_predator}) AvgAge: {stats.get_average_age('boid'):.1f}",
-            f"Predators: {len(predators)} (Born: {stats.predator_births} | Dead: {stats.predator_deaths_energy+stats.predator_deaths_health+stats.predator_deaths_thirst+stats.predator_deaths_age}) AvgAge: {stats.get_average_age('predator'):.1f}",
-            f"Food: {len(food_items)} | Water: {len(water_sources)} | Obstacles: {len(obstacles)}",
-            f"Particles: {len(particles)}",
-            "Controls: Drag to pan, Scroll to zoom, Space to pause, R to reset camera"
-        ]
-        for i, line in enumerate(stats_lines):
-            stats_surface = font.render(line, True, (180, 180, 180))
-            screen.blit(stats_surface, (10, 10 + i * 20))
-        if current_event:
-            event_text = f"Event: {current_event.replace('_', ' ').title()} ({int(event_timer_countdown / (1/SIM_SPEED))}s left)"
-            event_surface = font.render(event_text, True, (255, 220, 0))
-            screen.blit(event_surface, (WIDTH - event_surface.get_width() - 10, 10))
-        if story_timer > 0:
-            story_surface = story_font.render(story_message, True, (255, 255, 200))
-            story_rect = story_surface.get_rect(center=(WIDTH / 2, HEIGHT - 50))
-            screen.blit(story_surface, story_rect)
+        record_phase(phase_times, "events", phase_start)
+        frame_count += SIM_SPEED
+
+class SpeedController:
+    def __init__(self, speed=1.0, budget_ms=SPEED_FRAME_BUDGET_MS):
+        self.speed = 1.0
+        self.budget = budget_ms / 1000
+        self.ticks_per_second = 0.0
+        self._pending = 0.0
+        self._window_start = time.perf_counter()
+        self._window_ticks = 0
+        self.set_speed(speed)
+
+    def set_speed(self, speed):
+        self.speed = max(SPEED_STEPS[0], min(SPEED_STEPS[-1], float(speed)))
+        self._pending = min(self._pending, self.speed)
+
+    def faster(self):
+        self.set_speed(next((step for step in SPEED_STEPS if step > self.speed), SPEED_STEPS[-1]))
+
+    def slower(self):
+        self.set_speed(next((step for step in reversed(SPEED_STEPS) if step < self.speed), SPEED_STEPS[0]))
+
+    def run_frame(self, tick):
+        # Runs whole fixed-size ticks until the speed target or the frame's time budget is reached,
+        # so high speeds trade rendered frames for ticks instead of stretching SIM_SPEED.
+        self._pending += self.speed
+        deadline = time.perf_counter() + self.budget
+        ticks = 0
+        while self._pending >= 1.0:
+            tick()
+            ticks += 1
+            self._pending -= 1.0
+            if time.perf_counter() >= deadline:
+                break
+        self._pending = min(self._pending, 1.0)
+        self._window_ticks += ticks
+        now = time.perf_counter()
+        if now - self._window_start >= SPEED_RATE_WINDOW:
+            self.ticks_per_second = self._window_ticks / (now - self._window_start)
+            self._window_start = now
+            self._window_ticks = 0
+        return ticks
+
+async def run_simulation():
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Ecosystem Reborn: A Struggle for Survival")
+    try:
+        font = pygame.font.SysFont("Arial", 14)
+        story_font = pygame.font.SysFont("Arial", 20)
+    except pygame.error:
+        font = pygame.font.Font(None, 14)
+        story_font = pygame.font.Font(None, 20)
+    clock = pygame.time.Clock()
+    world = World()
+    stats = world.stats
+    camera = Camera()
+    speed = SpeedController(SIMULATION_SPEED)
+    metrics = None
+    if METRICS_ENABLED and platform.system() != "Emscripten":
+        metrics = MetricsPublisher()
+        metrics.speed_control = speed
+        metrics.analytics = stats
+        await metrics.start()
+    recorder = ReplayRecorder(REPLAY_RECORD_PATH) if REPLAY_RECORD_PATH else None
+    exporter = FrameExporter(EXPORT_DIRECTORY, EXPORT_ENCODER_COMMAND) if EXPORT_DIRECTORY or EXPORT_ENCODER_COMMAND else None
+    background = BackgroundCache()
+    rendered_frames = 0
+    last_published = -METRICS_PUBLISH_INTERVAL
+
+    def tick():
+        world.step()
+        if recorder:
+            recorder.record_tick(world.boids, world.predators, world.food_items, world.water_sources, world.obstacles)
+
+    running = True
+    paused = False
+    while running:
+        events = pygame.event.get()
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_r:
+                    camera.position = Vector2(WIDTH / 2, HEIGHT / 2)
+                    camera.zoom = 1.0
+                elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                    speed.faster()
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    speed.slower()
+                elif event.key in (pygame.K_0, pygame.K_KP0):
+                    speed.set_speed(1.0)
+        if paused:
+            if metrics and metrics.wants_snapshot():
+                metrics.fulfill_snapshot(build_entity_snapshot(frame_count, world.boids, world.predators, world.food_items, world.water_sources, world.obstacles))
+            await asyncio.sleep(1.0 / FPS)
+            continue
+        camera.update(events)
+        speed.run_frame(tick)
+        boids, predators, food_items = world.boids, world.predators, world.food_items
+        water_sources, obstacles, particles = world.water_sources, world.obstacles, world.particles
+        phase_start = time.perf_counter()
+        draw_world(screen, font, camera, world.event_color, boids, predators, food_items, water_sources, obstacles, particles, background)
+        draw_hud(screen, font, story_font, world,
+                 f"Frame: {int(frame_count)} FPS: {int(clock.get_fps())} Speed: {speed.speed:g}x ({speed.ticks_per_second:.0f} ticks/s)",
+                 "Controls: Drag to pan, Scroll to zoom, Space to pause, R to reset camera, +/- speed, 0 for 1x")
         pygame.display.flip()
+        if exporter and rendered_frames % EXPORT_EVERY == 0:
+            exporter.capture(screen)
+        rendered_frames += 1
+        record_phase(world.phase_times, "draw", phase_start)
+        if metrics:
+            if frame_count - last_published >= METRICS_PUBLISH_INTERVAL:
+                last_published = frame_count
+                metrics.publish(build_metrics(frame_count, speed.ticks_per_second, world.phase_times, boids, predators, food_items, stats,
+                                              world.pool.steering))
+            if metrics.wants_snapshot():
+                metrics.fulfill_snapshot(build_entity_snapshot(frame_count, boids, predators, food_items, water_sources, obstacles))
         clock.tick(FPS)
-        frame_count += SIM_SPEED
         await asyncio.sleep(1.0 / FPS)
+    if metrics:
+        await metrics.stop()
+    if recorder:
+        recorder.close()
+    if exporter:
+        exporter.close()
     pygame.quit()
 
-async def main():
+async def run_headless(max_ticks=None):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    world = World()
+    speed = SpeedController(SIMULATION_SPEED)
+    metrics = None
+    if METRICS_ENABLED and platform.system() != "Emscripten":
+        metrics = MetricsPublisher()
+        metrics.analytics = world.stats
+        await metrics.start()
+    recorder = ReplayRecorder(REPLAY_RECORD_PATH) if REPLAY_RECORD_PATH else None
+    exporter = None
+    if EXPORT_DIRECTORY or EXPORT_ENCODER_COMMAND:
+        exporter = FrameExporter(EXPORT_DIRECTORY, EXPORT_ENCODER_COMMAND)
+        surface = pygame.Surface((WIDTH, HEIGHT))
+        background = BackgroundCache()
+        font = pygame.font.Font(None, 18)
+        story_font = pygame.font.Font(None, 26)
+        camera = Camera()
+    started = time.perf_counter()
+    ticks = 0
+    try:
+        while max_ticks is None or ticks < max_ticks:
+            world.step()
+            if recorder:
+                recorder.record_tick(world.boids, world.predators, world.food_items, world.water_sources, world.obstacles)
+            if exporter and ticks % EXPORT_EVERY == 0:
+                phase_start = time.perf_counter()
+                draw_world(surface, font, camera, world.event_color, world.boids, world.predators, world.food_items,
+                           world.water_sources, world.obstacles, world.particles, background)
+                draw_hud(surface, font, story_font, world, f"Frame: {int(frame_count)}")
+                exporter.capture(surface)
+                record_phase(world.phase_times, "draw", phase_start)
+            ticks += 1
+            if metrics:
+                if ticks % METRICS_PUBLISH_INTERVAL == 0:
+                    speed.ticks_per_second = ticks / max(1e-9, time.perf_counter() - started)
+                    metrics.publish(build_metrics(frame_count, speed.ticks_per_second, world.phase_times,
+                                                  world.boids, world.predators, world.food_items, world.stats, world.pool.steering))
+                if metrics.wants_snapshot():
+                    metrics.fulfill_snapshot(build_entity_snapshot(frame_count, world.boids, world.predators, world.food_items,
+                                                                   world.water_sources, world.obstacles))
+                await asyncio.sleep(0)
+    finally:
+        elapsed = time.perf_counter() - started
+        print(f"Headless run: {ticks} ticks in {elapsed:.1f}s ({ticks / max(1e-9, elapsed):.1f} ticks/s)")
+        if metrics:
+            await metrics.stop()
+        if recorder:
+            recorder.close()
+        if exporter:
+            exporter.close()
+        pygame.quit()
+
+def resident_memory():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+def footprint(roots, follow=()):
+    # Bytes held by the roots and everything reachable from them through builtin containers, plus the
+    # attributes of instances of `follow`. Entities are only walked when `follow` includes them, so a
+    # subsystem that merely refers to an entity is not charged for it.
+    seen = set()
+    stack = list(roots)
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, Entity) and not isinstance(item, follow):
+            continue
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, collections.deque)):
+            stack.extend(item)
+        elif isinstance(item, follow):
+            if hasattr(item, "__dict__"):
+                stack.append(item.__dict__)
+            for name in getattr(type(item), "__slots__", ()):
+                stack.append(getattr(item, name, None))
+    return total
+
+def subsystem_footprints(world):
+    pool, stats = world.pool, world.stats
+    # The grid series covers the last tick's buckets and far-field tree as well as what persists between
+    # ticks; the member lists it indexes belong to the pool and are charged to "entities".
+    grid = [world.grid_tuner.density, pool.neighbor_lists.steps]
+    if stats.grid is not None:
+        grid += [stats.grid.levels, stats.grid.far_field_tree]
+    return {
+        "entities": footprint([pool.slots, pool.generations, pool.free_slots, pool.members, pool.pending_births], (Entity, Perception)),
+        "particles": footprint([world.particles], (Particle,)),
+        "analytics": footprint([stats.births, stats.deaths, stats.live, stats.birth_tick_sums, stats.birth_histograms,
+                                stats.vitals_histograms, stats.population_samples]),
+        "schedules": footprint([timers.slots, pool.vitals.queue]),
+        "grid": footprint(grid, (FarFieldTree, FarFieldNode)),
+    }
+
+def run_soak(ticks, sample_interval=SOAK_SAMPLE_INTERVAL, warmup=SOAK_WARMUP_TICKS):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    world = World()
+    subsystems = list(subsystem_footprints(world))
+    samples = []
+    violations = []
+    baseline = None
+    top_growth = []
+    done = 0
+    interrupted = False
+    print(f"{'tick':>10} {'agents':>7} {'tick ms':>8} {'rss MiB':>8} " + " ".join(f"{name + ' KiB':>14}" for name in subsystems))
+    try:
+        while done < ticks and not violations:
+            interval = min(sample_interval, ticks - done)
+            if SOAK_TRACEMALLOC_FRAMES and not tracemalloc.is_tracing() and done + interval > warmup // 2:
+                tracemalloc.start(SOAK_TRACEMALLOC_FRAMES)
+            started = time.perf_counter()
+            for _ in range(interval):
+                world.step()
+            done += interval
+            sample = {"tick": done, "tick_ms": (time.perf_counter() - started) / interval * 1000, "rss": resident_memory()}
+            sample.update(subsystem_footprints(world))
+            samples.append(sample)
+            if tracemalloc.is_tracing():
+                snapshot = tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+                if baseline is None:
+                    if done >= warmup:
+                        baseline = snapshot
+                elif done > warmup:
+                    top_growth = snapshot.compare_to(baseline, "lineno")[:SOAK_TOP_ALLOCATIONS]
+            print(f"{done:>10} {len(world.boids) + len(world.predators):>7} {sample['tick_ms']:>8.2f} {sample['rss'] / 1048576:>8.1f} "
+                  + " ".join(f"{sample[name] / 1024:>14.1f}" for name in subsystems))
+            for name, ceiling in SOAK_CEILINGS.items():
+                if sample.get(name, 0) > ceiling:
+                    violations.append(name)
+                    print(f"ceiling exceeded: {name} holds {sample[name] / 1048576:.1f} MiB (limit {ceiling / 1048576:.1f} MiB)")
+    except KeyboardInterrupt:
+        interrupted = True
+        print("soak interrupted")
+    finally:
+        tracemalloc.stop()
+    # Populations oscillate, so growth is judged on the least-squares trend across all post-warmup
+    # samples: the fitted change over that span relative to the series' mean. Memory series must also
+    # have grown by SOAK_GROWTH_MIN_BYTES, so that food items coming and going in a small world do not count.
+    settled = [sample for sample in samples if sample["tick"] > warmup]
+    growing = []
+    if len(settled) < 3:
+        print("not enough samples after the warmup to judge growth")
+    else:
+        xs = [sample["tick"] for sample in settled]
+        for name in ["tick_ms", "rss"] + subsystems:
+            ys = [sample[name] for sample in settled]
+            mean = sum(ys) / len(ys)
+            slope, _ = _least_squares(xs, ys)
+            change = slope * (xs[-1] - xs[0])
+            drift = change / mean if mean else 0.0
+            grew = drift > SOAK_GROWTH_TOLERANCE and (name == "tick_ms" or change > SOAK_GROWTH_MIN_BYTES)
+            if grew:
+                growing.append(name)
+            print(f"{name:>10} {drift:+8.1%} over {xs[-1] - xs[0]} ticks {'GROWING' if grew else 'flat'}")
+    if top_growth:
+        print("largest allocation growth since the warmup:")
+        for stat in top_growth:
+            frame = stat.traceback[0]
+            print(f"  {frame.filename}:{frame.lineno} {stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} blocks)")
+    # An interrupted soak has not covered the ticks it was asked for, so it cannot pass.
+    return not interrupted and not violations and not growing
+
+class ParityEngine:
+    # One side of a parity run. Both worlds share this module, so the engine's toggles, PARITY_STATE and
+    # random state are swapped in around everything it does and saved back afterwards.
+    def __init__(self, name, toggles, seed):
+        self.name = name
+        self.settings = dict(toggles)
+        self.settings.update({name: globals()[name] for name in PARITY_STATE})
+        self.settings["_entity_ids"] = itertools.count(1)
+        self.outer = None
+        saved = random.getstate()
+        random.seed(seed)
+        self.random_state = random.getstate()
+        random.setstate(saved)
+        self.elapsed = 0.0
+        self.world = self.run(World)
+
+    def run(self, action, *args):
+        module = globals()
+        self.outer = {name: module[name] for name in self.settings}, random.getstate()
+        module.update(self.settings)
+        random.setstate(self.random_state)
+        try:
+            return action(*args)
+        finally:
+            self.settings = {name: module[name] for name in self.settings}
+            self.random_state = random.getstate()
+            module.update(self.outer[0])
+            random.setstate(self.outer[1])
+
+    def step(self):
+        started = time.perf_counter()
+        self.world.step()
+        self.elapsed += time.perf_counter() - started
+        return parity_snapshot(self.world)
+
+def parity_snapshot(world):
+    agents = {}
+    for kind in (Boid, Predator):
+        for agent in world.pool.members[kind]:
+            if agent.is_alive:
+                agents[agent.entity_id] = (agent, agent.position.x, agent.position.y, agent.velocity.x,
+                                           agent.velocity.y) + agent.peek_vitals() + (agent.is_sick, agent.state)
+    food = {item.entity_id for item in world.food_items if item.is_alive}
+    return agents, food, (current_event, event_serial, story_index)
+
+def parity_divergence(reference, candidate, previous):
+    # First difference between two snapshots of the same tick as (subject, field, reference, candidate),
+    # or None; previous is the reference snapshot of the tick before, to tell births from deaths, and None
+    # when comparing the freshly created worlds.
+    if reference[2] != candidate[2]:
+        return "world", "event", reference[2], candidate[2]
+    agents, other = reference[0], candidate[0]
+    for entity_id in sorted(agents.keys() | other.keys()):
+        ours, theirs = agents.get(entity_id), other.get(entity_id)
+        if ours is None or theirs is None:
+            agent = (ours or theirs)[0]
+            field = "spawn" if previous is None else "death" if entity_id in previous[0] else "birth"
+            return f"{agent.species} #{entity_id}", field, ours is not None, theirs is not None
+        subject = f"{ours[0].species} #{entity_id}"
+        for field, index, tolerance in (("position", 1, PARITY_TOLERANCES["position"]),
+                                        ("velocity", 3, PARITY_TOLERANCES["velocity"])):
+            if abs(ours[index] - theirs[index]) > tolerance or abs(ours[index + 1] - theirs[index + 1]) > tolerance:
+                return subject, field, (ours[index], ours[index + 1]), (theirs[index], theirs[index + 1])
+        for field, index in (("energy", 5), ("thirst", 6), ("health", 7)):
+            if abs(ours[index] - theirs[index]) > PARITY_TOLERANCES["vitals"]:
+                return subject, field, ours[index], theirs[index]
+        if ours[8] != theirs[8]:
+            return subject, "sick", ours[8], theirs[8]
+        if ours[9] != theirs[9]:
+            return subject, "state", ours[9], theirs[9]
+    if reference[1] != candidate[1]:
+        return "food", "food", len(reference[1]), len(candidate[1])
+    return None
+
+def run_parity(ticks, candidate=None, reference=None, seed=PARITY_SEED):
+    # candidate maps toggles to the values under test, by default the module's current settings; reference
+    # overrides PARITY_REFERENCE, so that one optimization can be checked on top of others it relies on.
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    reference = dict(PARITY_REFERENCE, **(reference or {}))
+    if candidate is None:
+        candidate = {name: globals()[name] for name in PARITY_REFERENCE}
+    candidate = dict(reference, **candidate)
+    changed = sorted(name for name, value in candidate.items() if value != reference[name])
+    print(f"candidate: {', '.join(changed) or 'same toggles as the reference'}")
+    engines = [ParityEngine("reference", reference, seed), ParityEngine("candidate", candidate, seed)]
+    previous = engines[0].run(parity_snapshot, engines[0].world)
+    divergence = parity_divergence(previous, engines[1].run(parity_snapshot, engines[1].world), None)
+    diverged_at = 0 if divergence else None
+    for tick in range(1, ticks + 1):
+        reference, candidate = (engine.run(engine.step) for engine in engines)
+        if divergence is None:
+            divergence = parity_divergence(reference, candidate, previous)
+            if divergence:
+                diverged_at = tick
+        previous = reference
+    if divergence is None:
+        print(f"identical for {ticks} ticks")
+    else:
+        subject, field, ours, theirs = divergence
+        print(f"diverged at tick {diverged_at}: {subject} {field} ({PARITY_RULES[field]}): reference {ours}, candidate {theirs}")
+    reference_ms, candidate_ms = (engine.elapsed / max(1, ticks) * 1000 for engine in engines)
+    print(f"reference {reference_ms:.2f} ms/tick, candidate {candidate_ms:.2f} ms/tick, speedup {reference_ms / candidate_ms:.2f}x")
+    return divergence is None
+
+def benchmark_neighbor_lists(populations=None, ticks=BENCHMARK_TICKS):
+    # Steps identically seeded worlds of each size with and without neighbor lists and reports the
+    # agent phases' cost per tick; the crossover is the first size at which the lists pay for themselves.
+    global NUM_BOIDS, MAX_BOIDS, NEIGHBOR_LISTS_ENABLED
+    saved = NUM_BOIDS, MAX_BOIDS, NEIGHBOR_LISTS_ENABLED
+    crossover = None
+    print(f"{'boids':>7} {'grid ms':>9} {'lists ms':>9} {'speedup':>8} {'reused':>7}")
+    try:
+        for population in populations or BENCHMARK_POPULATIONS:
+            NUM_BOIDS = population
+            MAX_BOIDS = max(MAX_BOIDS, population)
+            timings = []
+            for enabled in (False, True):
+                NEIGHBOR_LISTS_ENABLED = enabled
+                random.seed(population)
+                world = World()
+                elapsed = 0.0
+                for _ in range(ticks):
+                    world.step()
+                    elapsed += agent_phase_time(world.phase_times)
+                timings.append(elapsed / ticks * 1000)
+            lists = world.pool.neighbor_lists
+            reused = lists.reuses / max(1, lists.reuses + lists.rebuilds)
+            speedup = timings[0] / timings[1]
+            if crossover is None and speedup > 1:
+                crossover = population
+            print(f"{population:>7} {timings[0]:>9.2f} {timings[1]:>9.2f} {speedup:>7.2f}x {reused:>6.0%}")
+    finally:
+        NUM_BOIDS, MAX_BOIDS, NEIGHBOR_LISTS_ENABLED = saved
+    print(f"crossover: {crossover if crossover is not None else 'not reached'} boids")
+    return crossover
+
+def benchmark_spatial_grid(populations=None, ticks=BENCHMARK_TICKS):
+    # Same worlds on the single GRID_CELL_SIZE grid and on the multi-resolution grid; "scan" is the number
+    # of bucketed candidates measured per neighbor actually found inside the query radius (species sparse
+    # enough to be scanned whole are left out of it).
+    global NUM_BOIDS, MAX_BOIDS, MULTI_RESOLUTION_GRID_ENABLED
+    saved = NUM_BOIDS, MAX_BOIDS, MULTI_RESOLUTION_GRID_ENABLED
+    print(f"{'boids':>7} {'single ms':>10} {'scan':>6} {'multi ms':>9} {'scan':>6} {'speedup':>8}")
+    try:
+        for population in populations or BENCHMARK_POPULATIONS:
+            NUM_BOIDS = population
+            MAX_BOIDS = max(MAX_BOIDS, population)
+            timings, scans = [], []
+            for enabled in (False, True):
+                MULTI_RESOLUTION_GRID_ENABLED = enabled
+                random.seed(population)
+                world = World()
+                elapsed = 0.0
+                for _ in range(ticks):
+                    world.step()
+                    elapsed += agent_phase_time(world.phase_times)
+                timings.append(elapsed / ticks * 1000)
+                tuner = world.grid_tuner
+                scans.append(tuner.scanned / max(1, tuner.found))
+            print(f"{population:>7} {timings[0]:>10.2f} {scans[0]:>6.1f} {timings[1]:>9.2f} {scans[1]:>6.1f} {timings[0] / timings[1]:>7.2f}x")
+    finally:
+        NUM_BOIDS, MAX_BOIDS, MULTI_RESOLUTION_GRID_ENABLED = saved
+
+def benchmark_steering(populations=None, ticks=BENCHMARK_TICKS):
+    # Steps seeded worlds, then times every agent's steering pass (flock or hunt) on its own: cost per
+    # agent and per perceived neighbor, the short-lived memory one pass allocates at its peak (traced
+    # with tracemalloc), and how often the garbage collector ran per simulated tick.
+    global NUM_BOIDS, MAX_BOIDS
+    saved = NUM_BOIDS, MAX_BOIDS
+    print(f"{'boids':>7} {'tick ms':>8} {'gc/tick':>8} {'us/agent':>9} {'ns/nbr':>7} {'peak B':>7}")
+    try:
+        for population in populations or STEERING_BENCHMARK_POPULATIONS:
+            NUM_BOIDS = population
+            MAX_BOIDS = max(MAX_BOIDS, population)
+            random.seed(population)
+            world = World()
+            gc_runs = sum(stats["collections"] for stats in gc.get_stats())
+            elapsed = 0.0
+            for _ in range(ticks):
+                world.step()
+                elapsed += agent_phase_time(world.phase_times)
+            gc_runs = sum(stats["collections"] for stats in gc.get_stats()) - gc_runs
+            pool = world.pool
+            grid = SpatialGrid(pool, world.grid_tuner)
+            agents = [agent for agent in world.boids + world.predators if agent.is_alive]
+            neighbors = sum(len(get_neighbors_from_grid(agent.position, radius, grid, species))
+                            for agent in agents for species, (_, radius) in INTERACTIONS[agent.species].items())
+            particles = []
+            start = time.perf_counter()
+            for agent in agents:
+                if isinstance(agent, Boid):
+                    agent.flock(pool, grid)
+                else:
+                    agent.hunt(pool, grid, particles)
+            steering = time.perf_counter() - start
+            peak = 0
+            tracemalloc.start()
+            try:
+                for agent in agents:
+                    tracemalloc.reset_peak()
+                    current = tracemalloc.get_traced_memory()[0]
+                    if isinstance(agent, Boid):
+                        agent.flock(pool, grid)
+                    else:
+                        agent.hunt(pool, grid, particles)
+                    peak += tracemalloc.get_traced_memory()[1] - current
+            finally:
+                tracemalloc.stop()
+            print(f"{population:>7} {elapsed / ticks * 1000:>8.2f} {gc_runs / ticks:>8.2f} {steering / len(agents) * 1e6:>9.1f} "
+                  f"{steering / max(1, neighbors) * 1e9:>7.0f} {peak / len(agents):>7.0f}")
+    finally:
+        NUM_BOIDS, MAX_BOIDS = saved
+
+def benchmark_far_field(populations=None, ticks=BENCHMARK_TICKS):
+    # Sums the boids and predators each boid would sense out to FAR_FIELD_RADIUS twice: exactly, from a
+    # wide grid query, and through the Barnes-Hut tree (build included); reports both times and how far
+    # the approximate boid centroid lands from the exact one.
+    global NUM_BOIDS, MAX_BOIDS
+    saved = NUM_BOIDS, MAX_BOIDS
+    print(f"{'boids':>7} {'exact ms':>9} {'tree ms':>8} {'speedup':>8} {'nodes':>6} {'err px':>7}")
+    try:
+        for population in populations or STEERING_BENCHMARK_POPULATIONS:
+            NUM_BOIDS = population
+            MAX_BOIDS = max(MAX_BOIDS, population)
+            random.seed(population)
+            world = World()
+            for _ in range(ticks):
+                world.step()
+            grid = SpatialGrid(world.pool, world.grid_tuner)
+            boids = [boid for boid in world.boids if boid.is_alive]
+            near, far = BOID_PERCEPTION_RADIUS, FAR_FIELD_RADIUS
+            exact = []
+            distances = []
+            start = time.perf_counter()
+            for boid in boids:
+                sums = []
+                for species in ("boid", "predator"):
+                    count = 0
+                    x = y = 0.0
+                    distances.clear()
+                    for entity, distance in zip(grid.query(boid.position, far, species, distances), distances):
+                        if near <= distance and entity.is_alive:
+                            count += 1
+                            x += entity.position.x
+                            y += entity.position.y
+                    sums.append((count, x, y))
+                exact.append(sums[0])
+            exact_time = time.perf_counter() - start
+            perception = Perception()
+            error = 0.0
+            start = time.perf_counter()
+            tree = grid.far_field()
+            approximate = []
+            for boid in boids:
+                tree.gather(boid.position, near, far, perception)
+                approximate.append((perception.far_boids, perception.far_x, perception.far_y))
+            tree_time = time.perf_counter() - start
+            compared = 0
+            for (count, x, y), (far_count, far_x, far_y) in zip(exact, approximate):
+                if count and far_count:
+                    error += math.hypot(x / count - far_x / far_count, y / count - far_y / far_count)
+                    compared += 1
+            print(f"{population:>7} {exact_time * 1000:>9.2f} {tree_time * 1000:>8.2f} {exact_time / tree_time:>7.1f}x "
+                  f"{tree.nodes:>6} {error / max(1, compared):>7.2f}")
+    finally:
+        NUM_BOIDS, MAX_BOIDS = saved
+
+def benchmark_packs(populations=None, ticks=BENCHMARK_TICKS):
+    # Steps seeded worlds with a given number of predators, then times every predator's sensing pass
+    # (state update and hunt) with each predator scanning for itself and with pack blackboards, the
+    # blackboard refresh included; clustering runs only every PACK_CLUSTER_INTERVAL ticks and is left out.
+    global NUM_PREDATORS, MAX_PREDATORS, PACK_COORDINATION_ENABLED
+    saved = NUM_PREDATORS, MAX_PREDATORS, PACK_COORDINATION_ENABLED
+    print(f"{'predators':>9} {'packs':>6} {'solo ms':>8} {'pack ms':>8} {'speedup':>8} {'shared':>7}")
+    try:
+        for population in populations or PACK_BENCHMARK_POPULATIONS:
+            NUM_PREDATORS = MAX_PREDATORS = population
+            PACK_COORDINATION_ENABLED = False
+            random.seed(population)
+            world = World()
+            for _ in range(ticks):
+                world.step()
+            pool = world.pool
+            grid = SpatialGrid(pool, world.grid_tuner)
+            predators = [predator for predator in world.predators if predator.is_alive]
+            particles = []
+            timings = []
+            for enabled in (False, True):
+                PACK_COORDINATION_ENABLED = enabled
+                if enabled:
+                    pool.packs.cluster(predators, grid)
+                start = time.perf_counter()
+                if enabled:
+                    pool.packs.refresh(predators, grid)
+                for predator in predators:
+                    predator.sense(pool, grid, particles)
+                timings.append((time.perf_counter() - start) * 1000)
+            pool.intents.kills.clear()
+            boards = {id(board): board for board in pool.packs.boards.values()}.values()
+            targets = [target.handle for board in boards for target in board.targets.values()]
+            shared = 1 - len(set(targets)) / max(1, len(targets))
+            print(f"{len(predators):>9} {len(boards):>6} {timings[0]:>8.2f} {timings[1]:>8.2f} {timings[0] / timings[1]:>7.2f}x {shared:>6.0%}")
+    finally:
+        NUM_PREDATORS, MAX_PREDATORS, PACK_COORDINATION_ENABLED = saved
+
+def benchmark_spawning(populations=None):
+    # Builds seeded worlds of each size one entity at a time and in bulk batches (best of three), and
+    # counts the agents that start inside an obstacle.
+    global NUM_BOIDS, MAX_BOIDS, BULK_SPAWN_ENABLED
+    saved = NUM_BOIDS, MAX_BOIDS, BULK_SPAWN_ENABLED
+    print(f"{'boids':>7} {'single ms':>10} {'inside':>7} {'bulk ms':>8} {'inside':>7} {'speedup':>8}")
+    try:
+        for population in populations or SPAWN_BENCHMARK_POPULATIONS:
+            NUM_BOIDS = population
+            MAX_BOIDS = max(MAX_BOIDS, population)
+            timings, inside = [], []
+            for enabled in (False, True):
+                BULK_SPAWN_ENABLED = enabled
+                best = float('inf')
+                for _ in range(3):
+                    world = None
+                    random.seed(population)
+                    start = time.perf_counter()
+                    world = World()
+                    best = min(best, time.perf_counter() - start)
+                timings.append(best * 1000)
+                inside.append(sum(1 for agent in world.boids + world.predators for obstacle in world.obstacles
+                                  if agent.position.distance_to(obstacle.position) < OBSTACLE_SIZE + agent.size))
+            print(f"{population:>7} {timings[0]:>10.1f} {inside[0]:>7} {timings[1]:>8.1f} {inside[1]:>7} {timings[0] / timings[1]:>7.2f}x")
+    finally:
+        NUM_BOIDS, MAX_BOIDS, BULK_SPAWN_ENABLED = saved
+
+def benchmark_slicing(populations=None, ticks=BENCHMARK_TICKS):
+    # Steps identically seeded worlds with every agent steering each tick and with time-slicing, and
+    # reports the agent phases' mean and worst tick, the share of passes that actually re-ran steering,
+    # how stale the reused forces were and how many refreshes the budget pushed back.
+    global NUM_BOIDS, MAX_BOIDS, STEERING_SLICING_ENABLED
+    saved = NUM_BOIDS, MAX_BOIDS, STEERING_SLICING_ENABLED
+    print(f"{'boids':>7} {'full ms':>8} {'worst':>7} {'sliced ms':>10} {'worst':>7} {'speedup':>8} {'fresh':>6} "
+          f"{'stale':>6} {'max':>4} {'deferred':>9}")
+    try:
+        for population in populations or STEERING_BENCHMARK_POPULATIONS:
+            NUM_BOIDS = population
+            MAX_BOIDS = max(MAX_BOIDS, population)
+            timings = []
+            for enabled in (False, True):
+                STEERING_SLICING_ENABLED = enabled
+                random.seed(population)
+                world = World()
+                elapsed = worst = 0.0
+                for _ in range(ticks):
+                    world.step()
+                    agents = agent_phase_time(world.phase_times)
+                    elapsed += agents
+                    worst = max(worst, agents)
+                timings.append((elapsed / ticks * 1000, worst * 1000))
+            summary = world.pool.steering.summary()
+            print(f"{population:>7} {timings[0][0]:>8.2f} {timings[0][1]:>7.2f} {timings[1][0]:>10.2f} {timings[1][1]:>7.2f} "
+                  f"{timings[0][0] / timings[1][0]:>7.2f}x {summary['refreshed']:>6.0%} {summary['mean_staleness']:>6.2f} "
+                  f"{summary['max_staleness']:>4g} {summary['deferred']:>9}")
+    finally:
+        NUM_BOIDS, MAX_BOIDS, STEERING_SLICING_ENABLED = saved
+
+BENCHMARKS = {"neighbors": benchmark_neighbor_lists, "grid": benchmark_spatial_grid, "steering": benchmark_steering,
+              "farfield": benchmark_far_field, "packs": benchmark_packs, "spawn": benchmark_spawning,
+              "slicing": benchmark_slicing}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ecosystem Reborn: A Struggle for Survival")
+    parser.add_argument("--record", metavar="PATH", help="record every tick to a compact replay file")
+    parser.add_argument("--replay", metavar="PATH", help="play back a recorded replay instead of simulating")
+    parser.add_argument("--speed", type=float, help="initial simulation speed multiplier (ticks per rendered frame)")
+    parser.add_argument("--headless", action="store_true", help="simulate without a window (SDL dummy video driver)")
+    parser.add_argument("--ticks", type=int, help="stop a headless run after this many ticks")
+    parser.add_argument("--export", metavar="DIR", help="write captured frames as numbered PNGs into DIR")
+    parser.add_argument("--encoder", metavar="CMD",
+                        help="pipe raw RGB frames to CMD instead, e.g. \"ffmpeg -y -f rawvideo -pix_fmt rgb24 -s {width}x{height} -r {fps} -i - run.mp4\"")
+    parser.add_argument("--export-every", type=int, metavar="N", help="capture every Nth tick (headless) or frame (interactive)")
+    parser.add_argument("--benchmark", choices=sorted(BENCHMARKS), help="run a headless benchmark and print its report")
+    parser.add_argument("--soak", type=int, metavar="TICKS", help="run TICKS headless ticks while checking memory and tick time for growth")
+    parser.add_argument("--parity", type=int, metavar="TICKS",
+                        help="step the reference tick and a candidate side by side for TICKS ticks and report where they diverge")
+    parser.add_argument("--candidate", action="append", choices=sorted(PARITY_REFERENCE), metavar="TOGGLE",
+                        help="with --parity, enable only this optimization over the reference (repeatable; default: current settings)")
+    parser.add_argument("--reference", action="append", choices=sorted(PARITY_REFERENCE), metavar="TOGGLE",
+                        help="with --parity, enable this optimization on both sides (repeatable)")
+    args = parser.parse_args(argv)
+    if args.speed is not None and not (args.speed > 0 and math.isfinite(args.speed)):
+        parser.error("--speed must be a positive number")
+    if args.export_every is not None and args.export_every <= 0:
+        parser.error("--export-every must be a positive integer")
+    if (args.candidate or args.reference) and not args.parity:
+        parser.error("--candidate and --reference only apply with --parity")
+    return args
+
+async def main(args=None):
+    global REPLAY_RECORD_PATH, SIMULATION_SPEED, EXPORT_DIRECTORY, EXPORT_ENCODER_COMMAND, EXPORT_EVERY
+    if args is not None and args.replay:
+        await run_replay_viewer(args.replay)
+        return
+    if args is not None and args.benchmark:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        BENCHMARKS[args.benchmark]()
+        return
+    if args is not None and args.soak:
+        if not run_soak(args.soak):
+            raise SystemExit(1)
+        return
+    if args is not None and args.parity:
+        candidate = {name: True for name in args.candidate} if args.candidate else None
+        reference = {name: True for name in args.reference or ()}
+        if not run_parity(args.parity, candidate, reference):
+            raise SystemExit(1)
+        return
+    if args is not None and args.record:
+        REPLAY_RECORD_PATH = args.record
+    if args is not None and args.speed is not None:
+        SIMULATION_SPEED = args.speed
+    if args is not None and args.export:
+        EXPORT_DIRECTORY = args.export
+    if args is not None and args.encoder:
+        EXPORT_ENCODER_COMMAND = args.encoder
+    if args is not None and args.export_every is not None:
+        EXPORT_EVERY = args.export_every
+    if args is not None and args.headless:
+        await run_headless(args.ticks)
+        return
     await run_simulation()
 
 if platform.system() == "Emscripten":
     asyncio.ensure_future(main())
 else:
     if __name__ == "__main__":
-        asyncio.run(main())
+        asyncio.run(main(parse_args()))